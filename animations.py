@@ -0,0 +1,264 @@
+"""
+🤸 Exercise Demo Animations for the Lumbar Spine Care Reminder
+
+Plays short frame-by-frame demonstrations of each stretch inside the
+reminder popup. Frames come from files in assets/exercises/:
+
+- <exercise>.gif   An animated GIF (every frame is used)
+- <exercise>.png   A horizontal strip of square frames side by side
+
+Frames are decoded only when they are first shown and kept in a
+size-limited LRU cache of PhotoImage objects that all popups share, so the
+second popup for the same exercise does not decode anything and memory
+never grows past the limit.
+
+Only Tk itself is needed: Tk 8.6 reads PNG and GIF files natively.
+"""
+
+import collections
+import os
+import time
+import tkinter as tk
+
+# Where the exercise animations live (next to this file)
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'exercises')
+
+# Milliseconds between frames (Tk can't read the delay stored in a GIF)
+FRAME_DELAY = 120
+
+
+class FrameCache:
+    """
+    LRU cache of decoded animation frames, limited by total pixel memory.
+
+    Images belong to one Tk interpreter, so there is one cache per Tk root.
+    Evicting a frame only drops the cache's reference: a popup that is
+    still showing it keeps its own reference until it moves on.
+
+    A PNG strip is cached next to the frames cut from it (it counts against
+    the same budget), so the budget should fit every exercise's frames plus
+    its strip: about 1.7 MB per 24-frame, 96 px exercise.
+    """
+
+    def __init__(self, root, max_bytes=16 * 1024 * 1024):
+        """
+        Args:
+            root: The Tk root (or any widget) the images are created for
+            max_bytes: Memory budget, counted as width * height * 4 per image
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self._images = collections.OrderedDict()  # (path, index or 'strip') -> (PhotoImage, size)
+        self._frame_counts = {}  # path -> number of frames, learned on reaching the end
+
+        # === STATISTICS (for the benchmark and diagnostics) ===
+        self.bytes_used = 0
+        self.peak_bytes = 0
+        self.hits = 0           # Frame lookups answered from the cache
+        self.misses = 0         # Frames that had to be decoded
+        self.strip_hits = 0     # PNG strips found in the cache when cutting a frame
+        self.strip_loads = 0    # PNG strips read from disk
+        self.evictions = 0
+        self.decode_seconds = 0.0
+
+    @property
+    def hit_rate(self):
+        """Share of frame lookups served without decoding (strips not counted)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def frame(self, path, index):
+        """
+        Return frame number index of an animation, or None if it doesn't exist.
+        """
+        key = (path, index)
+        cached = self._images.get(key)
+        if cached is not None:
+            self._images.move_to_end(key)
+            self.hits += 1
+            return cached[0]
+
+        known = self._frame_counts.get(path)
+        if known is not None and index >= known:
+            return None
+
+        if path.lower().endswith('.png'):
+            return self._load(path, index, lambda: self._crop_strip(path, index))
+
+        # A GIF frame may only hold what changed, so it is drawn over the one
+        # before it: start from the nearest earlier frame still in the cache
+        # and build forward from there
+        first = index
+        while first > 0 and (path, first - 1) not in self._images:
+            first -= 1
+        previous = self._images[(path, first - 1)][0] if first > 0 else None
+        for number in range(first, index + 1):
+            previous = self._load(path, number, lambda: self._gif_frame(path, number, previous))
+            if previous is None:
+                return None
+        return previous
+
+    def _load(self, path, index, decode):
+        """Decode one frame and cache it, or return None if there is no such frame."""
+        started = time.perf_counter()
+        try:
+            image = decode()
+        except tk.TclError:
+            # Past the last frame (or an unreadable file): remember where the end is
+            # so looping back to the start never has to ask Tk again
+            self._frame_counts[path] = index
+            return None
+        finally:
+            self.decode_seconds += time.perf_counter() - started
+
+        self.misses += 1
+        self._store((path, index), image)
+        return image
+
+    def clear(self):
+        """Drop every cached image."""
+        self._images.clear()
+        self.bytes_used = 0
+
+    def _store(self, key, image):
+        """Add an image to the cache, evicting the least recently used ones."""
+        size = image.width() * image.height() * 4
+        self._images[key] = (image, size)
+        self.bytes_used += size
+        while self.bytes_used > self.max_bytes and len(self._images) > 1:
+            _, (_, evicted_size) = self._images.popitem(last=False)
+            self.bytes_used -= evicted_size
+            self.evictions += 1
+        self.peak_bytes = max(self.peak_bytes, self.bytes_used)
+
+    def _strip(self, path):
+        """Return a whole PNG strip, reading it only if it isn't cached."""
+        key = (path, 'strip')
+        cached = self._images.get(key)
+        if cached is not None:
+            self._images.move_to_end(key)
+            self.strip_hits += 1
+            return cached[0]
+        strip = self._decode(path)
+        self.strip_loads += 1
+        self._store(key, strip)
+        return strip
+
+    def _crop_strip(self, path, index):
+        """Copy one square frame out of a horizontal PNG strip."""
+        strip = self._strip(path)
+        side = strip.height()
+        if (index + 1) * side > strip.width():
+            raise tk.TclError(f"{path} has no frame {index}")
+        frame = self._blank(side, side)
+        self._copy(frame, strip, (index * side, 0, (index + 1) * side, side))
+        return frame
+
+    def _gif_frame(self, path, index, previous):
+        """
+        Read one GIF frame. Tk returns each frame as stored in the file, and
+        optimized GIFs store only the part that changed (the rest is
+        transparent), so every frame after the first is drawn over a copy of
+        the frame before it. Frames that ask to clear back to the
+        background first are not supported: they keep the earlier picture.
+        """
+        raw = self._decode(path, f'gif -index {index}')
+        if previous is None:
+            return raw
+        frame = self._blank(previous.width(), previous.height())
+        self._copy(frame, previous)
+        self._copy(frame, raw)  # Transparent pixels leave the earlier frame showing
+        return frame
+
+    # === TK IMAGE OPERATIONS (replaced by the benchmark's headless stand-in) ===
+
+    def _decode(self, path, image_format=None):
+        """Read an image file into a new PhotoImage."""
+        options = {'format': image_format} if image_format else {}
+        return tk.PhotoImage(master=self.root, file=path, **options)
+
+    def _blank(self, width, height):
+        """Create an empty (fully transparent) PhotoImage."""
+        return tk.PhotoImage(master=self.root, width=width, height=height)
+
+    def _copy(self, target, source, region=None):
+        """Draw source (or one region of it) over target, keeping target where source is transparent."""
+        # PhotoImage.copy() can't take a source region before Python 3.13
+        if region is None:
+            target.tk.call(target, 'copy', source, '-compositingrule', 'overlay')
+        else:
+            target.tk.call(target, 'copy', source, '-from', *region, '-compositingrule', 'overlay')
+
+
+def find_animation(exercise, asset_dir=ASSET_DIR):
+    """
+    Return the animation file for an exercise, or None if there isn't one.
+    """
+    for extension in ('.gif', '.png'):
+        path = os.path.join(asset_dir, exercise + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+class ExercisePlayer:
+    """
+    Plays one exercise animation in a Label, looping until the label's
+    window is closed. Frames are fetched from the shared FrameCache.
+    """
+
+    def __init__(self, label, cache, frame_delay=FRAME_DELAY):
+        """
+        Args:
+            label: The Label the frames are shown in
+            cache: The shared FrameCache
+            frame_delay: Milliseconds between frames
+        """
+        self.label = label
+        self.cache = cache
+        self.frame_delay = frame_delay
+        self.path = None
+        self.index = 0
+        self._after_id = None
+
+    def play(self, path):
+        """
+        Start playing an animation file (stopping whatever was playing).
+
+        Returns:
+            True if the animation has at least one frame to show
+        """
+        self.stop()
+        if path is None or self.cache.frame(path, 0) is None:
+            return False
+        self.path = path
+        self.index = 0
+        self._show_next()
+        return True
+
+    def stop(self):
+        """Stop the animation, leaving the current frame on screen."""
+        if self._after_id is not None:
+            try:
+                self.label.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+
+    def _show_next(self):
+        try:
+            if not self.label.winfo_exists():
+                return
+            frame = self.cache.frame(self.path, self.index)
+            if frame is None and self.index > 0:
+                # Ran off the end: loop back to the first frame
+                self.index = 0
+                frame = self.cache.frame(self.path, 0)
+            if frame is None:
+                return
+            self.label.config(image=frame)
+            self.label.image = frame  # Keep it alive even if the cache evicts it
+            self.index += 1
+            self._after_id = self.label.after(self.frame_delay, self._show_next)
+        except tk.TclError:
+            pass  # Popup closed mid-frame
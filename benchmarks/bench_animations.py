@@ -0,0 +1,182 @@
+"""
+⏱️ Benchmark: exercise animation frame cache
+
+Creates PNG frame strips for the popup's exercises, then opens many
+reminder-style popups that each play one exercise all the way through,
+taking the exercises in turn like the app does. For each cache size it
+reports frame hits, frame decodes, strip reads, evictions, decode time
+and peak cache memory, and compares against every popup decoding its
+own frames.
+
+The default 4 exercises x 24 frames of 96 px need about 6.8 MB with
+their strips, so the default sizes show one cache that fits (16 MB, the
+app's setting) and one that doesn't (4 MB).
+
+Two backends:
+- tk: real PhotoImages in Toplevel popups. Needs a display (on a
+  headless Linux box, run it under xvfb-run).
+- fake: no display; images are stand-ins that only know their size. The
+  cache behaviour (hits, decodes, evictions, memory) is exactly the same,
+  but times and RSS are not meaningful.
+
+Run from the repository root:
+    xvfb-run python benchmarks/bench_animations.py --popups 500
+    python benchmarks/bench_animations.py --backend fake --cache-mb 16 8 4 2
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from animations import FrameCache
+
+# The popup's exercises first, then a few more for --exercises above 4
+EXERCISES = ('walk', 'back_stretch', 'shoulder_roll', 'deep_breath', 'neck_tilt', 'hip_circle')
+
+
+# === FAKE BACKEND ===
+
+class FakeImage:
+    """Stands in for a PhotoImage: it only knows its size."""
+
+    def __init__(self, width, height):
+        self._width = width
+        self._height = height
+
+    def width(self):
+        return self._width
+
+    def height(self):
+        return self._height
+
+
+class FakeFrameCache(FrameCache):
+    """FrameCache with the Tk image calls replaced, so it runs without a display."""
+
+    def __init__(self, strips, max_bytes=16 * 1024 * 1024):
+        """
+        Args:
+            strips: path -> (frames, side) for every strip that "exists"
+        """
+        super().__init__(None, max_bytes)
+        self.strips = strips
+
+    def _decode(self, path, image_format=None):
+        frames, side = self.strips[path]
+        return FakeImage(frames * side, side)
+
+    def _blank(self, width, height):
+        return FakeImage(width, height)
+
+    def _copy(self, target, source, region=None):
+        pass
+
+
+# === POPUPS ===
+
+def write_strip(root, path, frames, side):
+    """Write a PNG strip of simple coloured frames with a moving bar."""
+    strip = tk.PhotoImage(master=root, width=frames * side, height=side)
+    for frame in range(frames):
+        shade = 40 + frame * 180 // frames
+        strip.put(f"#{shade:02x}{255 - shade:02x}80", to=(frame * side, 0, (frame + 1) * side, side))
+        bar = frame * side // frames
+        strip.put('#ffffff', to=(frame * side + bar, 0, frame * side + bar + 4, side))
+    strip.write(path, format='png')
+
+
+def play_popups(root, paths, popups, frames, cache_for_popup):
+    """Open popups one after another, showing every frame of one exercise in each."""
+    for number in range(popups):
+        path = paths[number % len(paths)]
+        fetch = cache_for_popup().frame
+        if root is None:
+            for index in range(frames):
+                fetch(path, index)
+            continue
+        window = tk.Toplevel(root)
+        label = tk.Label(window)
+        label.pack()
+        for index in range(frames):
+            label.config(image=fetch(path, index))
+        root.update_idletasks()
+        window.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--popups', type=int, default=500)
+    parser.add_argument('--exercises', type=int, default=4, choices=range(1, len(EXERCISES) + 1))
+    parser.add_argument('--frames', type=int, default=24)
+    parser.add_argument('--side', type=int, default=96, help='Frame width and height in pixels')
+    parser.add_argument('--cache-mb', type=float, nargs='+', default=[16.0, 4.0],
+                        help='Cache sizes to try (default: 16 4)')
+    parser.add_argument('--backend', choices=('tk', 'fake'),
+                        default='tk' if os.environ.get('DISPLAY') else 'fake')
+    args = parser.parse_args()
+
+    fake = args.backend == 'fake'
+    root = None
+    if not fake:
+        root = tk.Tk()
+        root.withdraw()
+
+    frame_bytes = args.side * args.side * 4
+    working_set = args.exercises * 2 * args.frames * frame_bytes  # Frames plus the strip they came from
+    results = []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = [os.path.join(temp_dir, exercise + '.png') for exercise in EXERCISES[:args.exercises]]
+        strips = {path: (args.frames, args.side) for path in paths}
+        if not fake:
+            for path in paths:
+                write_strip(root, path, args.frames, args.side)
+
+        def new_cache(max_bytes=16 * 1024 * 1024):
+            return FakeFrameCache(strips, max_bytes) if fake else FrameCache(root, max_bytes)
+
+        # === WITH THE SHARED CACHE, ONE RUN PER SIZE ===
+        for cache_mb in args.cache_mb:
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            cache = new_cache(int(cache_mb * 1024 * 1024))
+            started = time.perf_counter()
+            play_popups(root, paths, args.popups, args.frames, lambda: cache)
+            seconds = time.perf_counter() - started
+            rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+            results.append((cache_mb, cache, seconds, rss_growth))
+
+        # === WITHOUT SHARING (every popup decodes its own frames) ===
+        uncached_popups = min(args.popups, 50)
+        started = time.perf_counter()
+        play_popups(root, paths, uncached_popups, args.frames, new_cache)
+        uncached_seconds = time.perf_counter() - started
+
+    if root is not None:
+        root.destroy()
+
+    frames_shown = args.popups * args.frames
+    print(f"backend: {args.backend}, {args.popups} popups x {args.frames} frames of "
+          f"{args.side}x{args.side}, {args.exercises} exercises in turn")
+    print(f"working set: {working_set / 1024 / 1024:.2f} MB (frames + strips)")
+    print(f"{'cache MB':>9}{'frame hits':>12}{'decodes':>9}{'hit %':>7}{'strip reads':>13}"
+          f"{'strip hits':>12}{'evictions':>11}{'peak MB':>9}{'ms/decode':>11}{'us/frame':>10}{'RSS MB':>8}")
+    for cache_mb, cache, seconds, rss_growth in results:
+        decode_ms = cache.decode_seconds / max(1, cache.misses) * 1000
+        print(f"{cache_mb:9.1f}{cache.hits:12}{cache.misses:9}{cache.hit_rate * 100:7.1f}"
+              f"{cache.strip_loads:13}{cache.strip_hits:12}{cache.evictions:11}"
+              f"{cache.peak_bytes / 1024 / 1024:9.2f}{decode_ms:11.3f}"
+              f"{seconds / frames_shown * 1e6:10.1f}{rss_growth / 1024:8.1f}")
+    print(f"uncached: {uncached_seconds / (uncached_popups * args.frames) * 1e6:.1f} us/frame "
+          f"({uncached_popups} popups, every frame decoded)")
+    if fake:
+        print("(fake backend: counts are real, times and RSS are not)")
+
+
+if __name__ == '__main__':
+    main()
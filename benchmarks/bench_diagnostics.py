@@ -0,0 +1,55 @@
+"""
+⏱️ Microbenchmark: cost of one diagnostics record on the UI thread
+
+Measures how long DiagnosticsLog.info() takes per call while the background
+flusher is running, and compares it to a plain logging.Logger writing
+straight to a file (what "naive logging from the Tk thread" would cost).
+
+Run from the repository root:
+    python benchmarks/bench_diagnostics.py
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diagnostics import DiagnosticsLog
+
+
+def time_per_call(func, iterations):
+    """Return the average time of func() in nanoseconds."""
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def main(iterations=200_000):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # === RING BUFFER (what the app uses) ===
+        diagnostics = DiagnosticsLog(os.path.join(temp_dir, 'diagnostics.log'))
+        diagnostics.start()
+        ring_ns = time_per_call(lambda: diagnostics.info('tick', interval=40), iterations)
+        diagnostics.stop()
+
+        # === NAIVE SYNCHRONOUS FILE LOGGING (for comparison) ===
+        logger = logging.getLogger('bench_naive')
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = logging.FileHandler(os.path.join(temp_dir, 'naive.log'))
+        logger.addHandler(handler)
+        naive_ns = time_per_call(lambda: logger.info('tick interval=%r', 40), iterations)
+        handler.close()
+
+    print(f"iterations:               {iterations}")
+    print(f"ring buffer record:       {ring_ns:8.0f} ns/call")
+    print(f"synchronous file logging: {naive_ns:8.0f} ns/call")
+    print(f"events dropped:           {diagnostics.dropped}")
+
+
+if __name__ == '__main__':
+    main()
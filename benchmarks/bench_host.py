@@ -0,0 +1,270 @@
+"""
+⏱️ Benchmark: one shared host vs one process per session
+
+Compares total memory (RSS and PSS) and CPU use of N reminder sessions
+run as N separate processes against the same N sessions served by one
+host.py process.
+
+Two backends:
+- xvfb: starts N Xvfb virtual displays and runs the real app on them
+- fake: no X server; every session is a Tcl interpreter plus a stand-in
+  app with the same timers and reminder checks but no widgets. This
+  measures interpreter, module, timer and thread overhead only.
+
+Linux only (reads /proc). Run from the repository root:
+    python benchmarks/bench_host.py --sessions 200 --backend xvfb
+    python benchmarks/bench_host.py --sessions 200 --backend fake
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tkinter as tk
+from datetime import datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+FIRST_DISPLAY = 200  # Virtual displays :200, :201, ...
+
+# A single-user copy of the app, started with protection switched on
+SEPARATE_APP = (
+    "import tkinter as tk, lumbar_reminder as m; "
+    "root = tk.Tk(); app = m.LumbarReminderApp(root); app.start_reminders(); root.mainloop()"
+)
+
+
+# === FAKE BACKEND ===
+
+class FakeApp:
+    """
+    Stand-in for LumbarReminderApp without widgets: same timers, same
+    reminder thread (when not hosted) and similar per-tick work.
+    """
+
+    def __init__(self, interp, scheduler=None):
+        from diagnostics import DiagnosticsLog
+        from suppression import SuppressionEngine
+        self.interp = interp
+        self.diagnostics = DiagnosticsLog()
+        self.scheduler = scheduler
+        self.suppression = SuppressionEngine()
+        self.pulse_alpha = 0.3
+        self.pulse_direction = 1
+        self.is_running = True
+        self.next_reminder_time = datetime.now() + timedelta(minutes=40)
+        self.status_text = ''
+        if scheduler is not None:
+            scheduler.add(self)
+        else:
+            self.interp.after(100, self.animate_ui)
+            self.interp.after(1000, self.update_clock)
+            threading.Thread(target=self.reminder_loop, daemon=True).start()
+
+    def step_animation(self):
+        self.pulse_alpha += self.pulse_direction * 0.1
+        if not 0.3 <= self.pulse_alpha <= 1:
+            self.pulse_direction = -self.pulse_direction
+
+    def animate_ui(self):
+        self.step_animation()
+        self.interp.after(100, self.animate_ui)
+
+    def refresh_clock(self):
+        remaining = (self.next_reminder_time - datetime.now()).total_seconds()
+        self.status_text = f"Next reminder in {int(remaining // 60)}m {int(remaining % 60)}s"
+
+    def update_clock(self):
+        self.refresh_clock()
+        self.interp.after(1000, self.update_clock)
+
+    def check_reminder(self):
+        if datetime.now() >= self.next_reminder_time:
+            self.next_reminder_time = datetime.now() + timedelta(minutes=40)
+
+    def reminder_loop(self):
+        while self.is_running:
+            time.sleep(60)
+            self.check_reminder()
+
+
+def run_fake_separate():
+    """One fake session in this process (what each separate copy would cost)."""
+    import lumbar_reminder  # noqa: F401  (a real copy pays for the whole app)
+    interp = tk.Tcl()
+    FakeApp(interp)
+    while True:
+        interp.tk.dooneevent()
+
+
+def run_fake_host(count):
+    """count fake sessions in this process, driven by the host's shared scheduler."""
+    from host import SharedScheduler
+    driver = tk.Tcl()
+    scheduler = SharedScheduler(driver)
+    interps = [tk.Tcl() for _ in range(count)]  # One interpreter per session, like one Tk root each
+    for interp in interps:
+        FakeApp(interp, scheduler)
+    scheduler.start()
+    while True:
+        driver.tk.dooneevent()
+
+
+# === MEASURING ===
+
+def process_memory(pid):
+    """Return (rss_kb, pss_kb) for a process."""
+    rss = pss = 0
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as smaps:
+            for line in smaps:
+                if line.startswith('Rss:'):
+                    rss = int(line.split()[1])
+                elif line.startswith('Pss:'):
+                    pss = int(line.split()[1])
+    except OSError:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    rss = pss = int(line.split()[1])
+    return rss, pss
+
+
+def process_cpu_ticks(pid):
+    """Return user + system CPU clock ticks used by a process so far."""
+    with open(f'/proc/{pid}/stat') as stat:
+        fields = stat.read().rsplit(')', 1)[1].split()
+    return int(fields[11]) + int(fields[12])
+
+
+def measure(processes, settle, duration):
+    """Let processes settle, then return (rss_mb, pss_mb, cpu_percent) totals."""
+    time.sleep(settle)
+    pids = [process.pid for process in processes if process.poll() is None]
+    if len(pids) != len(processes):
+        raise RuntimeError(f"{len(processes) - len(pids)} processes exited early")
+
+    ticks_before = sum(process_cpu_ticks(pid) for pid in pids)
+    time.sleep(duration)
+    ticks_after = sum(process_cpu_ticks(pid) for pid in pids)
+    memory = [process_memory(pid) for pid in pids]
+
+    cpu_seconds = (ticks_after - ticks_before) / os.sysconf('SC_CLK_TCK')
+    return (sum(rss for rss, _ in memory) / 1024,
+            sum(pss for _, pss in memory) / 1024,
+            cpu_seconds / duration * 100)
+
+
+def stop_all(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# === BACKENDS ===
+
+def start_virtual_displays(count):
+    """Start count Xvfb servers and wait until they accept connections."""
+    servers = []
+    for number in range(FIRST_DISPLAY, FIRST_DISPLAY + count):
+        servers.append(subprocess.Popen(
+            ['Xvfb', f':{number}', '-screen', '0', '1024x768x24', '-nolisten', 'tcp'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ))
+    deadline = time.time() + 60
+    for number in range(FIRST_DISPLAY, FIRST_DISPLAY + count):
+        while not os.path.exists(f'/tmp/.X11-unix/X{number}'):
+            if time.time() > deadline:
+                raise RuntimeError(f"Xvfb :{number} did not start")
+            time.sleep(0.05)
+    return servers
+
+
+def run_xvfb(count, settle, duration, temp_dir):
+    servers = start_virtual_displays(count)
+    env = dict(os.environ, HOME=temp_dir)  # Keep logs and caches out of the real home
+    try:
+        separate = [
+            subprocess.Popen([sys.executable, '-c', SEPARATE_APP], cwd=REPO_DIR,
+                             env=dict(env, DISPLAY=f':{FIRST_DISPLAY + index}'))
+            for index in range(count)
+        ]
+        try:
+            separate_result = measure(separate, settle, duration)
+        finally:
+            stop_all(separate)
+
+        sessions_path = os.path.join(temp_dir, 'sessions.json')
+        with open(sessions_path, 'w') as sessions_file:
+            json.dump({
+                'defaults': {'autostart': True},
+                'sessions': [{'name': f'user{index}', 'display': f':{FIRST_DISPLAY + index}'}
+                             for index in range(count)]
+            }, sessions_file)
+        hosted = [subprocess.Popen([sys.executable, 'host.py', '--sessions', sessions_path],
+                                   cwd=REPO_DIR, env=env)]
+        try:
+            host_result = measure(hosted, settle, duration)
+        finally:
+            stop_all(hosted)
+    finally:
+        stop_all(servers)
+    return separate_result, host_result
+
+
+def run_fake(count, settle, duration, temp_dir):
+    script = os.path.abspath(__file__)
+    env = dict(os.environ, HOME=temp_dir)
+    separate = [subprocess.Popen([sys.executable, script, '--fake-separate'], cwd=REPO_DIR, env=env)
+                for _ in range(count)]
+    try:
+        separate_result = measure(separate, settle, duration)
+    finally:
+        stop_all(separate)
+
+    hosted = [subprocess.Popen([sys.executable, script, '--fake-host', str(count)], cwd=REPO_DIR, env=env)]
+    try:
+        host_result = measure(hosted, settle, duration)
+    finally:
+        stop_all(hosted)
+    return separate_result, host_result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--backend', choices=('xvfb', 'fake'),
+                        default='xvfb' if shutil.which('Xvfb') else 'fake')
+    parser.add_argument('--settle', type=float, default=10, help='Seconds to wait before measuring')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to measure CPU over')
+    parser.add_argument('--fake-separate', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--fake-host', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.fake_separate:
+        return run_fake_separate()
+    if args.fake_host:
+        return run_fake_host(args.fake_host)
+
+    run = run_xvfb if args.backend == 'xvfb' else run_fake
+    with tempfile.TemporaryDirectory() as temp_dir:
+        separate, hosted = run(args.sessions, args.settle, args.duration, temp_dir)
+
+    print(f"backend: {args.backend}, {args.sessions} sessions, CPU over {args.duration:.0f}s")
+    print(f"{'':22}{'RSS MB':>10}{'PSS MB':>10}{'CPU %':>10}")
+    for label, (rss, pss, cpu) in ((f'{args.sessions} processes', separate), ('1 shared host', hosted)):
+        print(f"{label:22}{rss:10.1f}{pss:10.1f}{cpu:10.2f}")
+
+
+if __name__ == '__main__':
+    main()
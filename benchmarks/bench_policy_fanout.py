@@ -0,0 +1,137 @@
+"""
+⏱️ Benchmark: policy fan-out latency to many subscribers
+
+Starts a PolicyServer, connects N simulated clients from a separate
+process (raw sockets speaking the same framed protocol), publishes a
+series of policy deltas and reports how long it took each client to
+receive each delta.
+
+Run from the repository root:
+    python benchmarks/bench_policy_fanout.py --clients 10000 --rounds 10
+
+Each client uses one file descriptor on each side, so the open file
+limit (ulimit -n) must be a little above the client count.
+"""
+
+import argparse
+import multiprocessing
+import os
+import selectors
+import socket
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from policy import PolicyServer, decode_frames, encode_frame
+
+STALL_TIMEOUT = 30.0  # Give up if no client hears anything for this long
+
+
+def run_clients(port, count, rounds, ready, results):
+    """
+    Child process: open `count` subscriptions and time every delta received.
+    Puts the list of latencies on `results`, or an error message if some
+    deltas can no longer arrive (the server dropped clients, or went quiet).
+    """
+    selector = selectors.DefaultSelector()
+    subscribe = encode_frame({'type': 'subscribe', 'version': 0})
+    for _ in range(count):
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.sendall(subscribe)
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ, [bytearray(), 0])  # [buffer, deltas received]
+
+    latencies = []
+    snapshots = 0
+    dropped = 0
+    outstanding = count * rounds  # Deltas still owed to clients that are connected
+    ready_sent = False
+    while outstanding > 0:
+        events = selector.select(timeout=STALL_TIMEOUT)
+        if not events:
+            results.put(f"no data for {STALL_TIMEOUT:.0f}s with {outstanding} deltas outstanding")
+            return
+        for key, _ in events:
+            sock, state = key.fileobj, key.data
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                data = b''
+            if not data:
+                # The server dropped this client: its remaining deltas will never come
+                selector.unregister(sock)
+                sock.close()
+                dropped += 1
+                outstanding -= rounds - state[1]
+                continue
+            received_at = time.time()
+            state[0].extend(data)
+            for message in decode_frames(state[0]):
+                if message['type'] == 'snapshot':
+                    snapshots += 1
+                elif message['type'] == 'delta':
+                    latencies.append(received_at - message['changes']['bench_sent_at'])
+                    state[1] += 1
+                    outstanding -= 1
+        if not ready_sent and snapshots + dropped >= count:
+            ready.set()
+            ready_sent = True
+
+    if dropped:
+        results.put(f"the server dropped {dropped} of {count} clients")
+    else:
+        results.put(latencies)
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    server = PolicyServer('127.0.0.1', 0, policy={'reminder_interval': 40})
+    server.start()
+
+    ready = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    started = time.perf_counter()
+    clients = multiprocessing.Process(
+        target=run_clients, args=(server.port, args.clients, args.rounds, ready, results)
+    )
+    clients.start()
+    while not ready.wait(1.0):
+        if not clients.is_alive():
+            server.stop()
+            sys.exit("client process exited before every client subscribed")
+    print(f"{args.clients} clients subscribed in {time.perf_counter() - started:.2f}s")
+
+    # Publish one delta at a time so each round measures a clean fan-out
+    publish_times = []
+    for round_number in range(args.rounds):
+        started = time.perf_counter()
+        server.publish({'reminder_interval': 30 + round_number, 'bench_sent_at': time.time()})
+        publish_times.append(time.perf_counter() - started)
+        time.sleep(0.5)
+
+    outcome = results.get()
+    clients.join()
+    server.stop()
+    if isinstance(outcome, str):
+        sys.exit(f"benchmark failed: {outcome}")
+    latencies = sorted(outcome)
+
+    print(f"deltas delivered:  {len(latencies)} ({args.rounds} rounds)")
+    print(f"publish() call:    {statistics.mean(publish_times) * 1e6:.0f} us avg")
+    print(f"latency p50:       {percentile(latencies, 0.50) * 1000:.1f} ms")
+    print(f"latency p99:       {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"latency max:       {latencies[-1] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
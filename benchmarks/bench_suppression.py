@@ -0,0 +1,108 @@
+"""
+⏱️ Benchmark: calendar suppression with a large ICS file
+
+Generates a calendar with tens of thousands of meetings (plus some
+recurring ones), then measures streaming parse time and peak memory,
+interval tree build time, and the cost of "is now suppressed?" and
+"when is the next free slot?" queries.
+
+Peak memory comes from the resource module, so this runs on Linux/macOS.
+
+Run from the repository root:
+    python benchmarks/bench_suppression.py --events 50000
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from suppression import SuppressionEngine, parse_working_hours
+
+
+def write_calendar(path, events, recurring, start):
+    """Write a synthetic ICS file with random 15-90 minute meetings."""
+    rng = random.Random(42)
+    with open(path, 'w', encoding='utf-8') as ics_file:
+        ics_file.write('BEGIN:VCALENDAR\r\nVERSION:2.0\r\n')
+        for number in range(events):
+            begin = start + timedelta(minutes=15 * rng.randrange(0, 4 * 24 * 365))
+            end = begin + timedelta(minutes=rng.choice((15, 30, 45, 60, 90)))
+            ics_file.write(
+                'BEGIN:VEVENT\r\n'
+                f'UID:event-{number}@bench\r\n'
+                f'DTSTART:{begin:%Y%m%dT%H%M%S}\r\n'
+                f'DTEND:{end:%Y%m%dT%H%M%S}\r\n'
+                f'SUMMARY:Meeting {number} with a fairly long title that gets\r\n'
+                ' folded onto a second line\r\n'
+                'END:VEVENT\r\n'
+            )
+        for number in range(recurring):
+            begin = start - timedelta(days=rng.randrange(0, 1000)) + timedelta(hours=rng.randrange(8, 17))
+            ics_file.write(
+                'BEGIN:VEVENT\r\n'
+                f'DTSTART:{begin:%Y%m%dT%H%M%S}\r\n'
+                'DURATION:PT30M\r\n'
+                f'RRULE:FREQ=WEEKLY;BYDAY={rng.choice(("MO", "TU,TH", "MO,WE,FR"))}\r\n'
+                f'SUMMARY:Recurring {number}\r\n'
+                'END:VEVENT\r\n'
+            )
+        ics_file.write('END:VCALENDAR\r\n')
+
+
+def time_queries(func, moments):
+    started = time.perf_counter()
+    for moment in moments:
+        func(moment)
+    return (time.perf_counter() - started) / len(moments) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=50000)
+    parser.add_argument('--recurring', type=int, default=500)
+    parser.add_argument('--queries', type=int, default=100000)
+    args = parser.parse_args()
+
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'bench.ics')
+        write_calendar(path, args.events, args.recurring, start)
+        size_mb = os.path.getsize(path) / 1e6
+
+        engine = SuppressionEngine()
+        engine.set_working_hours(parse_working_hours('Mon-Fri 08:00-18:00'))
+        engine.set_quiet_windows([(12 * 60, 13 * 60)])
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        loaded = engine.load_ics(path)
+        parse_seconds = time.perf_counter() - started
+        rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    # First query builds the tree for the current window (plus the next block)
+    started = time.perf_counter()
+    engine.is_suppressed(start)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    # Queries spread over the next 12 days, so a couple of windows get built and reused
+    rng = random.Random(7)
+    moments = [start + timedelta(seconds=rng.randrange(0, 12 * 24 * 3600)) for _ in range(args.queries)]
+    suppressed_us = time_queries(engine.is_suppressed, moments)
+    next_us = time_queries(engine.next_allowed, moments)
+
+    print(f"calendar:            {loaded} events loaded from {size_mb:.1f} MB")
+    print(f"streaming parse:     {parse_seconds:.2f}s, peak RSS grew {rss_growth / 1024:.1f} MB")
+    print(f"tree build:          {build_ms:.1f} ms ({len(engine.tree_for(start)[2])} intervals in window)")
+    print(f"is_suppressed():     {suppressed_us:.2f} us/query")
+    print(f"next_allowed():      {next_us:.2f} us/query")
+
+
+if __name__ == '__main__':
+    main()
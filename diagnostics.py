@@ -0,0 +1,341 @@
+"""
+🩺 Diagnostics Log for the Lumbar Spine Care Reminder
+
+A tiny, structured event recorder that is safe to call from the Tkinter
+thread. Every event goes into a fixed-size in-memory ring buffer (just a
+slot assignment, no disk access), and a background thread flushes new
+events to a rotating log file every second or so.
+
+When something goes wrong the whole buffer can be dumped to a separate
+file, so we can see what the app was doing right before the problem.
+
+Usage:
+    diagnostics = DiagnosticsLog()
+    diagnostics.start()
+    diagnostics.info('reminder_shown', interval=40)
+    diagnostics.exception('sound_failed')   # inside an except block
+    diagnostics.dump()                      # write the full buffer now
+"""
+
+import itertools
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+
+# === DEFAULT LOCATIONS ===
+# Everything the app writes lives in one folder in the user's home directory
+DEFAULT_LOG_DIR = os.path.join(os.path.expanduser('~'), '.lumbar_reminder')
+DEFAULT_LOG_FILE = os.path.join(DEFAULT_LOG_DIR, 'diagnostics.log')
+
+# Level names used in the log file (kept short so lines stay readable)
+DEBUG = 'DEBUG'
+INFO = 'INFO'
+WARNING = 'WARNING'
+ERROR = 'ERROR'
+
+
+class DiagnosticsLog:
+    """
+    Ring-buffer event log with an asynchronous, rotating file writer.
+
+    Recording an event only builds a small tuple and stores it in a
+    pre-allocated list slot, so it costs about a microsecond on the UI
+    thread. The oldest events are overwritten once the buffer is full;
+    the flusher thread notes how many it missed if it ever falls behind.
+    """
+
+    def __init__(self, path=DEFAULT_LOG_FILE, capacity=4096,
+                 flush_interval=1.0, max_bytes=512 * 1024, backup_count=3, max_dumps=10):
+        """
+        Set up the buffer and the rotating file handler (nothing is
+        written to disk until the flusher thread is started).
+
+        Args:
+            path: Where the rotating log file is written
+            capacity: How many recent events the ring buffer keeps
+            flush_interval: Seconds between background flushes
+            max_bytes: Rotate the log file once it grows past this size
+            backup_count: How many rotated files to keep around
+            max_dumps: How many dump files to keep (the oldest are deleted)
+        """
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.max_dumps = max_dumps
+
+        # === RING BUFFER ===
+        # next() on itertools.count is atomic under the GIL, so the Tk
+        # thread and the reminder thread can both record without a lock
+        self._slots = [None] * capacity
+        self._sequence = itertools.count()
+        self._flushed_up_to = 0  # Sequence number of the next unflushed event
+        self.dropped = 0         # Events overwritten before they were flushed
+        self._dump_numbers = itertools.count(1)  # Keeps dumps taken in the same second apart
+
+        # === BACKGROUND FLUSHER ===
+        self._handler = None
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    # === RECORDING (called from any thread, must stay cheap) ===
+
+    def record(self, level, event, **fields):
+        """
+        Store one event in the ring buffer. No formatting, no I/O.
+
+        Args:
+            level: One of DEBUG, INFO, WARNING or ERROR
+            event: Short snake_case name for what happened
+            **fields: Extra details to attach (kept as raw objects)
+        """
+        seq = next(self._sequence)
+        self._slots[seq % self.capacity] = (seq, time.time(), level, event, fields)
+
+    def debug(self, event, **fields):
+        self.record(DEBUG, event, **fields)
+
+    def info(self, event, **fields):
+        self.record(INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        self.record(WARNING, event, **fields)
+
+    def error(self, event, **fields):
+        self.record(ERROR, event, **fields)
+
+    def exception(self, event, **fields):
+        """
+        Record an ERROR event with the traceback of the exception currently
+        being handled. Only call this from inside an except block.
+        """
+        fields['traceback'] = traceback.format_exc()
+        self.record(ERROR, event, **fields)
+
+    # === READING THE BUFFER ===
+
+    def snapshot(self):
+        """
+        Return the events currently in the buffer, oldest first.
+        """
+        records = [slot for slot in list(self._slots) if slot is not None]
+        records.sort(key=lambda rec: rec[0])
+        return records
+
+    @staticmethod
+    def format_record(rec):
+        """
+        Turn one buffered event into a single human-readable log line.
+        """
+        seq, timestamp, level, event, fields = rec
+        stamp = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        details = ''.join(f" {key}={value!r}" for key, value in fields.items())
+        return f"{stamp} #{seq} {level} {event}{details}"
+
+    # === FLUSHING TO DISK (background thread) ===
+
+    def start(self):
+        """
+        Open the rotating log file and start the background flusher thread.
+        """
+        if self._thread is not None:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._handler = logging.handlers.RotatingFileHandler(
+            self.path,
+            maxBytes=self.max_bytes,
+            backupCount=self.backup_count,
+            encoding='utf-8'
+        )
+        self._handler.setFormatter(logging.Formatter('%(message)s'))
+
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._flush_loop, name='diagnostics-flusher', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Flush whatever is left and shut the background thread down.
+        """
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        self._handler.close()
+        self._handler = None
+
+    def flush(self):
+        """
+        Write every event recorded since the last flush to the log file.
+        Normally called by the background thread, but safe to call directly.
+        """
+        with self._flush_lock:
+            if self._handler is None:
+                return
+
+            # Take a copy of the slots first so the UI thread never waits on us
+            slots = list(self._slots)
+            pending = sorted(
+                (rec for rec in slots if rec is not None and rec[0] >= self._flushed_up_to),
+                key=lambda rec: rec[0]
+            )
+            if not pending:
+                return
+
+            # A record() call takes its sequence number before it fills the slot,
+            # so a gap may just be an event that is still being written. Only a
+            # gap whose slot has since been reused by a newer event is really lost.
+            lost_below = pending[-1][0] - self.capacity + 1
+            expected = self._flushed_up_to
+            for rec in pending:
+                seq = rec[0]
+                if seq > expected:
+                    missed = min(seq, lost_below) - expected
+                    if missed > 0:
+                        self.dropped += missed
+                        self._emit(f"... {missed} diagnostics events dropped (buffer overrun)")
+                        expected += missed
+                    if seq > expected:
+                        break  # Still being written: pick it up on the next flush
+                self._emit(self.format_record(rec))
+                expected = seq + 1
+            self._flushed_up_to = expected
+            self._handler.flush()
+
+    def _emit(self, line):
+        """Hand one formatted line to the rotating file handler."""
+        self._handler.emit(logging.makeLogRecord({'msg': line}))
+
+    def _flush_loop(self):
+        """
+        Background loop: wake up every flush_interval seconds and write
+        out anything new. Runs until stop() is called.
+        """
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Never let a disk problem take the app down; keep the error
+                # in the buffer so it shows up in the next dump
+                self.exception('diagnostics_flush_failed')
+        self.flush()
+
+    # === CRASH / ON-DEMAND DUMPS ===
+
+    def dump(self, reason='on_demand', path=None):
+        """
+        Write the complete ring buffer to its own timestamped file. Only the
+        newest max_dumps automatic dump files are kept.
+
+        Args:
+            reason: Why the dump was taken (ends up in the file header)
+            path: Optional explicit file path for the dump
+
+        Returns:
+            The path of the dump file that was written
+        """
+        directory = None
+        if path is None:
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            directory = os.path.dirname(self.path) or '.'
+            path = os.path.join(
+                directory, f"diagnostics-dump-{stamp}-{os.getpid()}-{next(self._dump_numbers)}.log")
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        records = self.snapshot()
+        with open(path, 'w', encoding='utf-8') as dump_file:
+            dump_file.write(f"# Diagnostics dump ({reason}) at {datetime.now().isoformat()}\n")
+            dump_file.write(f"# {len(records)} events, {self.dropped} dropped before flush\n")
+            for rec in records:
+                dump_file.write(self.format_record(rec) + '\n')
+        if directory is not None:
+            self._prune_dumps(directory)
+        return path
+
+    def _prune_dumps(self, directory):
+        """Delete the oldest dump files so at most max_dumps are left."""
+        dumps = []
+        for name in os.listdir(directory):
+            if name.startswith('diagnostics-dump-') and name.endswith('.log'):
+                dump_path = os.path.join(directory, name)
+                try:
+                    dumps.append((os.path.getmtime(dump_path), dump_path))
+                except OSError:
+                    pass  # Deleted by another process in the meantime
+        dumps.sort()
+        for _, dump_path in dumps[:max(0, len(dumps) - self.max_dumps)]:
+            try:
+                os.remove(dump_path)
+            except OSError:
+                pass
+
+    def install_crash_hooks(self, root=None):
+        """
+        Dump the buffer automatically whenever an exception goes unhandled,
+        whether on the main thread, a background thread or inside a Tk callback.
+
+        Args:
+            root: Optional Tk root whose callback errors should also be caught
+        """
+        previous_excepthook = sys.excepthook
+        previous_thread_hook = threading.excepthook
+
+        def on_crash(exc_type, exc_value, exc_tb):
+            self.record(ERROR, 'unhandled_exception', traceback=''.join(
+                traceback.format_exception(exc_type, exc_value, exc_tb)))
+            self._dump_quietly('crash')
+            previous_excepthook(exc_type, exc_value, exc_tb)
+
+        def on_thread_crash(args):
+            self.record(ERROR, 'unhandled_thread_exception', thread=getattr(args.thread, 'name', None),
+                        traceback=''.join(traceback.format_exception(
+                            args.exc_type, args.exc_value, args.exc_traceback)))
+            self._dump_quietly('thread_crash')
+            previous_thread_hook(args)
+
+        sys.excepthook = on_crash
+        threading.excepthook = on_thread_crash
+
+        if root is not None:
+            self.watch_tk_root(root)
+
+    def watch_tk_root(self, root, **fields):
+        """
+        Record and dump errors raised inside a Tk root's callbacks.
+
+        Args:
+            root: The Tk root to watch
+            **fields: Extra details attached to the error event (e.g. session name)
+        """
+        # Tk swallows callback errors by printing them; record and dump instead
+        previous_tk_hook = root.report_callback_exception
+
+        def on_tk_error(exc_type, exc_value, exc_tb):
+            self.record(ERROR, 'tk_callback_exception', traceback=''.join(
+                traceback.format_exception(exc_type, exc_value, exc_tb)), **fields)
+            self._dump_quietly('tk_callback_error')
+            previous_tk_hook(exc_type, exc_value, exc_tb)
+
+        root.report_callback_exception = on_tk_error
+
+    def _dump_quietly(self, reason):
+        """Dump the buffer, ignoring any error (we're already crashing)."""
+        try:
+            self.dump(reason)
+        except Exception:
+            pass
@@ -0,0 +1,498 @@
+"""
+🖥️ Shared Host for Terminal Servers
+
+Runs the reminder for many logged-in users from a single Python process.
+Each session gets its own Tk root on its own X display, with its own
+settings, calendar and reminder state, while everything that can be
+shared is shared:
+
+- One interpreter and one copy of every imported module
+- One scheduler timer that drives the clock, animations and reminder
+  checks of every session (instead of timers and a thread per session)
+- One gradient color table per size, worked out once for all windows
+- One policy connection per policy server, fanned out to its sessions
+- One diagnostics log, with each event tagged by session
+
+The sessions file is re-read whenever it changes, so sessions can be
+added and removed as users log in and out.
+
+Sessions file (JSON):
+    {
+      "defaults": {"working_hours": "Mon-Fri 09:00-17:30", "autostart": true},
+      "sessions": [
+        {"name": "alice", "display": ":10", "calendar": ["/home/alice/work.ics"]},
+        {"name": "bob", "display": ":11", "reminder_interval": 30,
+         "policy_server": "policy-host:8765", "xauthority": "/home/bob/.Xauthority"}
+      ]
+    }
+
+Connecting to another user's display needs that display's X cookie:
+"xauthority" names the file to read it from (the host must be allowed to
+read it). Without it the host's own $XAUTHORITY is used.
+
+Losing an X server is fatal: Xlib ends the whole process when a display
+it is connected to goes away. A session must therefore be removed from
+the sessions file, and the host given time to notice, before its X
+server stops. The file is checked every 5 seconds, so wait at least that
+long (or until the log shows "session_closed" for it).
+
+Usage:
+    python host.py --sessions sessions.json
+"""
+
+import argparse
+import json
+import os
+import tkinter as tk
+
+from diagnostics import DiagnosticsLog, DEFAULT_LOG_DIR
+from lumbar_reminder import LumbarReminderApp, load_schedule_settings
+from policy import PolicyClient, DEFAULT_PORT
+from suppression import parse_working_hours
+
+# The host keeps its files apart from any single-user copy of the app
+HOST_DIR = os.path.join(DEFAULT_LOG_DIR, 'host')
+
+# Settings a session may set (anything in "defaults" applies to every session)
+SESSION_SETTINGS = ('display', 'xauthority', 'reminder_interval', 'working_hours', 'calendar',
+                    'policy_server', 'autostart')
+
+# How often the sessions file is checked for changes (milliseconds)
+SESSIONS_POLL_MS = 5000
+
+
+def check_session_settings(settings):
+    """
+    Make sure a session's settings can be used, before any window is opened.
+
+    Raises:
+        ValueError: Naming the first setting that is wrong
+    """
+    for key in ('display', 'xauthority', 'working_hours', 'policy_server'):
+        if settings.get(key) is not None and not isinstance(settings[key], str):
+            raise ValueError(f"{key} must be a string, not {settings[key]!r}")
+
+    interval = settings.get('reminder_interval')
+    if interval is not None:
+        if isinstance(interval, bool):
+            raise ValueError(f"reminder_interval must be a number of minutes, not {interval!r}")
+        try:
+            int(interval)
+        except (ValueError, TypeError, OverflowError):
+            raise ValueError(f"reminder_interval must be a number of minutes, not {interval!r}") from None
+
+    if settings.get('working_hours'):
+        try:
+            parse_working_hours(settings['working_hours'])
+        except ValueError:
+            raise ValueError(f"working_hours {settings['working_hours']!r} can't be read") from None
+
+    calendars = settings.get('calendar', [])
+    if not isinstance(calendars, list) or not all(isinstance(path, str) for path in calendars):
+        raise ValueError(f"calendar must be a list of file paths, not {calendars!r}")
+
+    server = settings.get('policy_server')
+    if server:
+        _, _, port = server.partition(':')
+        if port and not (port.isdigit() and 0 < int(port) < 65536):
+            raise ValueError(f"policy_server {server!r} has a bad port")
+
+
+class SessionDiagnostics:
+    """
+    Records into the host's shared DiagnosticsLog, tagging every event
+    with the session it came from.
+    """
+
+    def __init__(self, log, session):
+        self.log = log
+        self.session = session
+
+    def debug(self, event, **fields):
+        self.log.debug(event, session=self.session, **fields)
+
+    def info(self, event, **fields):
+        self.log.info(event, session=self.session, **fields)
+
+    def warning(self, event, **fields):
+        self.log.warning(event, session=self.session, **fields)
+
+    def error(self, event, **fields):
+        self.log.error(event, session=self.session, **fields)
+
+    def exception(self, event, **fields):
+        self.log.exception(event, session=self.session, **fields)
+
+
+class SharedScheduler:
+    """
+    One timer for every session in the process.
+
+    Every 100 ms it advances each session's animation; every second it
+    refreshes each session's clock; and every check_interval seconds it
+    asks each running session whether a reminder is due. That replaces
+    two Tk timers and one sleeping thread per session.
+    """
+
+    ANIMATION_MS = 100
+
+    def __init__(self, interp, check_interval=60, on_lost=None):
+        """
+        Args:
+            interp: Any Tcl/Tk interpreter to run the timer on (the host's own)
+            check_interval: Seconds between reminder checks (the old thread's sleep)
+            on_lost: Called as on_lost(app) when a session's window has gone away
+        """
+        self.interp = interp
+        self.check_every = max(1, int(check_interval * 1000 // self.ANIMATION_MS))
+        self.clock_every = 1000 // self.ANIMATION_MS
+        self.on_lost = on_lost
+        self.apps = []
+        self.ticks = 0
+        self._after_id = None
+
+    def add(self, app):
+        """Start driving an app (called by LumbarReminderApp itself)."""
+        self.apps.append(app)
+
+    def remove(self, app):
+        """Stop driving an app."""
+        if app in self.apps:
+            self.apps.remove(app)
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.interp.after(self.ANIMATION_MS, self._tick)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.interp.after_cancel(self._after_id)
+            self._after_id = None
+
+    @staticmethod
+    def _window_exists(app):
+        try:
+            return bool(app.root.winfo_exists())
+        except tk.TclError:
+            return False  # The Tk application itself has been destroyed
+
+    def _tick(self):
+        self.ticks += 1
+        refresh_clocks = self.ticks % self.clock_every == 0
+        check_reminders = self.ticks % self.check_every == 0
+
+        lost = []
+        for app in self.apps:
+            try:
+                app.step_animation()
+                if refresh_clocks:
+                    app.refresh_clock()
+                if check_reminders and app.is_running:
+                    app.check_reminder()
+            except Exception as error:
+                if isinstance(error, tk.TclError) and not self._window_exists(app):
+                    # The session's window was destroyed behind our back. (A display
+                    # that goes away never gets here: Xlib ends the whole process.)
+                    app.diagnostics.exception('session_window_lost')
+                    lost.append(app)
+                else:
+                    # A bug, not a lost window: log it and keep the session.
+                    # One broken session must not stop the others either
+                    app.diagnostics.exception('session_tick_failed')
+
+        for app in lost:
+            self.remove(app)
+            if self.on_lost is not None:
+                self.on_lost(app)
+
+        self._after_id = self.interp.after(self.ANIMATION_MS, self._tick)
+
+
+class Session:
+    """One user's reminder: a Tk root on their display plus the app in it."""
+
+    def __init__(self, name, settings):
+        self.name = name
+        self.settings = settings
+        self.root = None
+        self.app = None
+
+
+class SessionHost:
+    """
+    Opens, runs and closes sessions described by a sessions file, all in
+    one process and one thread.
+    """
+
+    def __init__(self, sessions_path, diagnostics=None, check_interval=60):
+        """
+        Args:
+            sessions_path: The JSON sessions file (re-read when it changes)
+            diagnostics: Shared DiagnosticsLog (one under ~/.lumbar_reminder/host by default)
+            check_interval: Seconds between reminder checks
+        """
+        self.sessions_path = sessions_path
+        self.diagnostics = diagnostics or DiagnosticsLog(os.path.join(HOST_DIR, 'diagnostics.log'))
+
+        # A plain Tcl interpreter (no display needed) owns the shared timers,
+        # so the host keeps running even when no one is logged in
+        self.interp = tk.Tcl()
+        self.scheduler = SharedScheduler(self.interp, check_interval,
+                                         on_lost=self._session_lost)
+
+        self.sessions = {}        # name -> Session
+        self.closed = set()       # Sessions the user closed; not reopened until the file changes them
+        self.policy_clients = {}  # "host:port" -> PolicyClient shared by its sessions
+        self._sessions_mtime = None
+        self._running = False
+
+    # === SESSIONS FILE ===
+
+    def read_sessions_file(self):
+        """
+        Return {name: settings} from the sessions file, with defaults filled in.
+        Entries that can't be used are logged and left out.
+
+        Raises:
+            OSError, ValueError: If the file as a whole can't be read
+        """
+        with open(self.sessions_path, encoding='utf-8') as sessions_file:
+            config = json.load(sessions_file)
+        if not isinstance(config, dict):
+            raise ValueError('the sessions file must contain a JSON object')
+        defaults = config.get('defaults', {})
+        sessions = config.get('sessions', [])
+        if not isinstance(defaults, dict) or not isinstance(sessions, list):
+            raise ValueError('"defaults" must be an object and "sessions" a list')
+
+        wanted = {}
+        for position, entry in enumerate(sessions):
+            if not isinstance(entry, dict):
+                self.diagnostics.warning('session_entry_invalid', position=position,
+                                         error='entry is not an object')
+                continue
+            settings = {key: value for key, value in defaults.items() if key in SESSION_SETTINGS}
+            settings.update({key: value for key, value in entry.items() if key in SESSION_SETTINGS})
+            name = entry.get('name') or settings.get('display')
+            if not isinstance(name, str) or not name:
+                self.diagnostics.warning('session_entry_invalid', position=position,
+                                         error='entry has neither a name nor a display')
+                continue
+            if name in wanted:
+                self.diagnostics.warning('session_entry_invalid', position=position,
+                                         error=f'session {name!r} is listed twice')
+                continue
+            wanted[name] = settings
+        return wanted
+
+    def sync_sessions(self):
+        """
+        Open sessions that are new (or changed) in the sessions file and
+        close the ones that were removed.
+        """
+        try:
+            wanted = self.read_sessions_file()
+        except (OSError, ValueError) as error:
+            self.diagnostics.warning('sessions_file_unreadable', path=self.sessions_path, error=str(error))
+            return
+
+        for name in list(self.sessions):
+            if name not in wanted or wanted[name] != self.sessions[name].settings:
+                self.close_session(name)
+        self.closed = {name for name in self.closed if name in wanted}
+
+        for name, settings in wanted.items():
+            if name not in self.sessions and name not in self.closed:
+                self.open_session(name, settings)
+
+    def _watch_sessions_file(self):
+        """Re-read the sessions file every few seconds if it has changed."""
+        try:
+            try:
+                mtime = os.path.getmtime(self.sessions_path)
+            except OSError:
+                mtime = None
+            if mtime != self._sessions_mtime:
+                self._sessions_mtime = mtime
+                self.closed.clear()  # An edited file is a fresh start for every session
+                self.sync_sessions()
+        except Exception:
+            self.diagnostics.exception('sessions_sync_failed')
+        finally:
+            if self._running:
+                self.interp.after(SESSIONS_POLL_MS, self._watch_sessions_file)
+
+    # === OPENING AND CLOSING SESSIONS ===
+
+    def open_session(self, name, settings):
+        """
+        Open a Tk root on the session's display and start the app in it.
+
+        Returns:
+            The new Session, or None if it could not be opened (the reason
+            is logged; it is tried again when the sessions file changes)
+        """
+        diagnostics = SessionDiagnostics(self.diagnostics, name)
+        try:
+            check_session_settings(settings)
+        except ValueError as error:
+            diagnostics.warning('session_settings_invalid', error=str(error))
+            return None
+
+        session = Session(name, settings)
+        try:
+            session.root = self._connect(settings)
+        except tk.TclError as error:
+            # Display not there (yet), or we may not use it
+            diagnostics.warning('display_unavailable', display=settings.get('display'), error=str(error))
+            return None
+
+        try:
+            self.diagnostics.watch_tk_root(session.root, session=name)
+            session.root.protocol('WM_DELETE_WINDOW', lambda: self.close_session(name, by_user=True))
+            session.app = LumbarReminderApp(session.root, diagnostics=diagnostics, scheduler=self.scheduler)
+            # Registered before the policy is read, so a policy pushed from here on reaches it
+            self.sessions[name] = session
+
+            # === PER-SESSION SETTINGS ===
+            app = session.app
+            if 'reminder_interval' in settings:
+                app.reminder_interval.set(max(5, min(120, int(settings['reminder_interval']))))
+                app.update_time_display()
+            load_schedule_settings(app, settings.get('working_hours'), settings.get('calendar', []))
+
+            client = self._policy_client(settings.get('policy_server'))
+            if client is not None and client.policy:
+                app.apply_policy(client.policy)
+
+            if settings.get('autostart'):
+                app.start_reminders()
+        except Exception:
+            # One broken session must not take the host (or its other sessions) down
+            diagnostics.exception('session_open_failed', display=settings.get('display'))
+            self.sessions.pop(name, None)
+            if session.app is not None:
+                self.scheduler.remove(session.app)
+            try:
+                session.root.destroy()
+            except tk.TclError:
+                pass
+            return None
+
+        diagnostics.info('session_opened', display=settings.get('display'))
+        return session
+
+    @staticmethod
+    def _connect(settings):
+        """
+        Open a Tk root on the session's display, using the session's own
+        X authority file if it has one.
+        """
+        xauthority = settings.get('xauthority')
+        if not xauthority:
+            return tk.Tk(screenName=settings.get('display'), className='LumbarReminder')
+
+        # Xlib reads $XAUTHORITY while connecting, so set it just for this connection
+        previous = os.environ.get('XAUTHORITY')
+        os.environ['XAUTHORITY'] = xauthority
+        try:
+            return tk.Tk(screenName=settings.get('display'), className='LumbarReminder')
+        finally:
+            if previous is None:
+                del os.environ['XAUTHORITY']
+            else:
+                os.environ['XAUTHORITY'] = previous
+
+    def close_session(self, name, by_user=False):
+        """
+        Close a session's window and forget its state.
+        """
+        session = self.sessions.pop(name, None)
+        if session is None:
+            return
+        if by_user:
+            self.closed.add(name)
+        self.scheduler.remove(session.app)
+        try:
+            session.root.destroy()
+        except tk.TclError:
+            pass  # Display already gone
+        self.diagnostics.info('session_closed', session=name, by_user=by_user)
+
+    def _session_lost(self, app):
+        """The scheduler found a session whose window has disappeared."""
+        for name, session in list(self.sessions.items()):
+            if session.app is app:
+                self.close_session(name)
+
+    # === SHARED POLICY CONNECTIONS ===
+
+    def _policy_client(self, server):
+        """Return the (shared) policy client for a server, starting it on first use."""
+        if not server:
+            return None
+        if server not in self.policy_clients:
+            host, _, port = server.partition(':')
+            cache_name = 'policy-' + server.replace(':', '-') + '.json'
+            client = PolicyClient(
+                host, int(port or DEFAULT_PORT),
+                cache_path=os.path.join(HOST_DIR, cache_name),
+                on_policy=lambda policy, version, server=server: self._fan_out_policy(server, policy, version),
+                diagnostics=self.diagnostics
+            )
+            client.start()
+            self.policy_clients[server] = client
+        return self.policy_clients[server]
+
+    def _fan_out_policy(self, server, policy, version):
+        """Hand a new policy to every session that follows this server."""
+        for session in list(self.sessions.values()):
+            if session.settings.get('policy_server') == server:
+                session.app.receive_policy(policy, version)
+
+    # === MAIN LOOP ===
+
+    def run(self):
+        """
+        Serve every session until interrupted. One thread handles all of
+        the Tk event loops at once.
+        """
+        self.diagnostics.start()
+        self.diagnostics.install_crash_hooks()
+        self._running = True
+        self._watch_sessions_file()
+        self.scheduler.start()
+        self.diagnostics.info('host_started', sessions=len(self.sessions))
+        try:
+            while self._running:
+                # Handles events for every Tk root in this thread, plus our timers
+                self.interp.tk.dooneevent()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Close every session and stop the policy connections."""
+        self._running = False
+        self.scheduler.stop()
+        for name in list(self.sessions):
+            self.close_session(name)
+        for client in self.policy_clients.values():
+            client.stop()
+        self.diagnostics.info('host_stopped')
+        self.diagnostics.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve many reminder sessions from one process')
+    parser.add_argument('--sessions', required=True, help='JSON file describing the sessions')
+    parser.add_argument('--check-interval', type=float, default=60,
+                        help='Seconds between reminder checks (default 60)')
+    args = parser.parse_args()
+
+    SessionHost(args.sessions, check_interval=args.check_interval).run()
+
+
+if __name__ == '__main__':
+    main()
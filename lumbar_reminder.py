@@ -23,6 +23,79 @@ import threading
 from datetime import datetime, timedelta
 import os
 import math
+import argparse
+import functools
+
+from diagnostics import DiagnosticsLog
+from policy import PolicyClient, DEFAULT_PORT, parse_quiet_hours
+from suppression import SuppressionEngine, parse_working_hours
+from animations import FrameCache, ExercisePlayer, find_animation
+
+@functools.lru_cache(maxsize=None)
+def background_gradient(height):
+    """
+    Colors for the main window's background, one per pixel row.
+    Worked out once per process and shared by every window that needs them.
+    """
+    # Color values for our gradient (RGB format)
+    dark_blue = (15, 15, 35)     # Very dark blue at top
+    medium_blue = (26, 33, 62)   # Medium blue in middle  
+    accent_blue = (16, 33, 62)   # Slightly different blue at bottom
+    
+    colors = []
+    for i in range(height):
+        # Calculate where we are in the gradient (0.0 to 1.0)
+        ratio = i / height
+        
+        # Blend colors smoothly
+        if ratio < 0.5:  # First half of gradient
+            factor = ratio * 2
+            r = int(dark_blue[0] + (medium_blue[0] - dark_blue[0]) * factor)
+            g = int(dark_blue[1] + (medium_blue[1] - dark_blue[1]) * factor)
+            b = int(dark_blue[2] + (medium_blue[2] - dark_blue[2]) * factor)
+        else:  # Second half of gradient  
+            factor = (ratio - 0.5) * 2
+            r = int(medium_blue[0] + (accent_blue[0] - medium_blue[0]) * factor)
+            g = int(medium_blue[1] + (accent_blue[1] - medium_blue[1]) * factor)
+            b = int(medium_blue[2] + (accent_blue[2] - medium_blue[2]) * factor)
+        
+        # Convert to hex color format
+        colors.append(f"#{r:02x}{g:02x}{b:02x}")
+    return tuple(colors)
+
+
+@functools.lru_cache(maxsize=None)
+def alert_gradient(height):
+    """
+    Colors for the reminder popup's eye-catching background, one per pixel row
+    (red to orange to purple to dark). Also worked out only once per process.
+    """
+    colors = []
+    for i in range(height):
+        ratio = i / height
+        
+        if ratio < 0.3:
+            # Red to orange section (urgent feel)
+            factor = ratio / 0.3
+            r = int(255 - (255 - 220) * factor)  # Red to orange
+            g = int(71 + (140 - 71) * factor)
+            b = int(87 + (0 - 87) * factor)
+        elif ratio < 0.7:
+            # Orange to purple section (transition)
+            factor = (ratio - 0.3) / 0.4
+            r = int(220 - (220 - 156) * factor)  # Orange to purple
+            g = int(140 - (140 - 39) * factor)
+            b = int(0 + (176 - 0) * factor)
+        else:
+            # Purple to dark section (fade to bottom)
+            factor = (ratio - 0.7) / 0.3
+            r = int(156 - (156 - 15) * factor)   # Purple to dark
+            g = int(39 - (39 - 15) * factor)
+            b = int(176 - (176 - 35) * factor)
+        
+        colors.append(f"#{r:02x}{g:02x}{b:02x}")
+    return tuple(colors)
+
 
 class LumbarReminderApp:
     """
@@ -32,13 +105,20 @@ class LumbarReminderApp:
     by providing regular reminders to stand up, stretch, and move around.
     """
     
-    def __init__(self, root):
+    def __init__(self, root, diagnostics=None, scheduler=None):
         """
         Initialize the application with all necessary settings and UI components.
         
         Args:
             root: The main Tkinter window
+            diagnostics: Optional DiagnosticsLog that records what the app does
+            scheduler: Optional shared scheduler that drives the clock, animations
+                and reminder checks (used when one process hosts many sessions)
         """
+        # === DIAGNOSTICS ===
+        # Cheap in-memory event log (a private one if none was passed in)
+        self.diagnostics = diagnostics if diagnostics is not None else DiagnosticsLog()
+        
         # === WINDOW SETUP === 
         self.root = root
         self.root.title("🦴 Lumbar Spine Care Reminder")
@@ -49,8 +129,9 @@ class LumbarReminderApp:
         # Try to set a custom icon (optional)
         try:
             self.root.iconbitmap(default='')
-        except:
-            pass  # No worries if icon doesn't work
+        except Exception:
+            # No worries if icon doesn't work, but keep a note of it
+            self.diagnostics.exception('icon_setup_failed')
         
         # === ANIMATION VARIABLES ===
         # These create smooth pulsing effects for the UI
@@ -59,15 +140,34 @@ class LumbarReminderApp:
         self.gradient_offset = 0
         
         # === USER SETTINGS ===
-        self.reminder_interval = tk.IntVar(value=40)  # How often to remind (minutes)
+        # Owned by this window's interpreter: with several roots in one process
+        # (host.py) a master-less variable would live in the first root instead
+        self.reminder_interval = tk.IntVar(master=self.root, value=40)  # How often to remind (minutes)
         self.is_running = False  # Is the reminder system active?
         self.reminder_thread = None  # Background thread for timing
+        self.scheduler = scheduler  # Shared scheduler instead of our own timers/thread
         self.next_reminder_time = None  # When is the next reminder due?
         
+        # === CENTRAL POLICY ===
+        # Settings pushed by the department's policy server (if any)
+        self.pending_policy = None  # Latest policy from the client thread, applied on the Tk thread
+        
+        # === QUIET HOURS AND CALENDAR ===
+        # Decides when reminders must wait (meetings, lunch, after hours)
+        self.suppression = SuppressionEngine()
+        
+        # === EXERCISE ANIMATIONS ===
+        # Decoded demo frames are shared by every popup (and capped in size)
+        self.frame_cache = FrameCache(self.root)
+        self.exercise_index = 0  # Which exercise the next popup demonstrates
+        
         # === START THE APP ===
         self.setup_ui()  # Create the beautiful interface
-        self.update_clock()  # Start the real-time clock
-        self.animate_ui()  # Start the smooth animations
+        if self.scheduler is not None:
+            self.scheduler.add(self)  # The shared scheduler ticks us from now on
+        else:
+            self.update_clock()  # Start the real-time clock
+            self.animate_ui()  # Start the smooth animations
         
     def setup_ui(self):
         """
@@ -293,29 +393,7 @@ class LumbarReminderApp:
         This gives our app a professional, modern look that's easy on the eyes.
         """
         # Draw 550 horizontal lines, each with a slightly different color
-        for i in range(550):
-            # Color values for our gradient (RGB format)
-            dark_blue = (15, 15, 35)     # Very dark blue at top
-            medium_blue = (26, 33, 62)   # Medium blue in middle  
-            accent_blue = (16, 33, 62)   # Slightly different blue at bottom
-            
-            # Calculate where we are in the gradient (0.0 to 1.0)
-            ratio = i / 550
-            
-            # Blend colors smoothly
-            if ratio < 0.5:  # First half of gradient
-                factor = ratio * 2
-                r = int(dark_blue[0] + (medium_blue[0] - dark_blue[0]) * factor)
-                g = int(dark_blue[1] + (medium_blue[1] - dark_blue[1]) * factor)
-                b = int(dark_blue[2] + (medium_blue[2] - dark_blue[2]) * factor)
-            else:  # Second half of gradient  
-                factor = (ratio - 0.5) * 2
-                r = int(medium_blue[0] + (accent_blue[0] - medium_blue[0]) * factor)
-                g = int(medium_blue[1] + (accent_blue[1] - medium_blue[1]) * factor)
-                b = int(medium_blue[2] + (accent_blue[2] - medium_blue[2]) * factor)
-            
-            # Convert to hex color format and draw the line
-            color = f"#{r:02x}{g:02x}{b:02x}"
+        for i, color in enumerate(background_gradient(550)):
             self.canvas.create_line(0, i, 600, i, fill=color, tags='gradient')
     
     def animate_ui(self):
@@ -323,6 +401,15 @@ class LumbarReminderApp:
         Create subtle pulsing animations to make the interface feel alive.
         This runs continuously in the background to create smooth effects.
         """
+        self.step_animation()
+        
+        # Schedule the next animation frame (10 times per second)
+        self.root.after(100, self.animate_ui)
+    
+    def step_animation(self):
+        """
+        Advance the pulsing animation by one frame.
+        """
         # Create a pulsing effect (like breathing)
         self.pulse_alpha += self.pulse_direction * 0.1
         
@@ -338,9 +425,6 @@ class LumbarReminderApp:
         if hasattr(self, 'canvas'):
             # Rotate gradient offset for future animations
             self.gradient_offset = (self.gradient_offset + 1) % 360
-            
-        # Schedule the next animation frame (10 times per second)
-        self.root.after(100, self.animate_ui)
     
     def start_reminders(self):
         """
@@ -359,11 +443,14 @@ class LumbarReminderApp:
             
             # Calculate when the first reminder should appear
             self.next_reminder_time = datetime.now() + timedelta(minutes=self.reminder_interval.get())
+            self.diagnostics.info('reminders_started', interval=self.reminder_interval.get())
             self.update_status()  # Refresh the display
             
-            # Start the background monitoring thread
-            self.reminder_thread = threading.Thread(target=self.reminder_loop, daemon=True)
-            self.reminder_thread.start()
+            # Start the background monitoring thread (the shared scheduler
+            # checks for us instead when there is one)
+            if self.scheduler is None:
+                self.reminder_thread = threading.Thread(target=self.reminder_loop, daemon=True)
+                self.reminder_thread.start()
             
     def stop_reminders(self):
         """
@@ -372,6 +459,7 @@ class LumbarReminderApp:
         """
         # Turn off the monitoring
         self.is_running = False
+        self.diagnostics.info('reminders_stopped')
         
         # Reset button states and colors
         self.start_button.config(state=tk.NORMAL, bg='#00ff88')     # Active green
@@ -390,15 +478,30 @@ class LumbarReminderApp:
         # Keep checking as long as the system is running
         while self.is_running:
             time.sleep(60)  # Wait 1 minute between checks
+            self.check_reminder()
+    
+    def check_reminder(self):
+        """
+        Show the reminder if it's due (or move it to the next free slot
+        if we're in a meeting or quiet hours).
+        """
+        # Is it time for a reminder?
+        now = datetime.now()
+        if self.is_running and now >= self.next_reminder_time:
+            # In a meeting or quiet hours? Move the reminder to the next free slot
+            if self.suppression.is_suppressed(now):
+                self.next_reminder_time = self.suppression.next_allowed(now)
+                self.diagnostics.info('reminder_deferred', until=self.next_reminder_time,
+                                      reasons=self.suppression.reasons(now))
+                return
             
-            # Is it time for a reminder?
-            if self.is_running and datetime.now() >= self.next_reminder_time:
-                self.show_reminder()  # Show the dramatic reminder popup!
+            self.diagnostics.info('reminder_due', interval=self.reminder_interval.get())
+            self.show_reminder()  # Show the dramatic reminder popup!
+            
+            # Schedule the next reminder (if still running)
+            if self.is_running:
+                self.next_reminder_time = datetime.now() + timedelta(minutes=self.reminder_interval.get())
                 
-                # Schedule the next reminder (if still running)
-                if self.is_running:
-                    self.next_reminder_time = datetime.now() + timedelta(minutes=self.reminder_interval.get())
-                    
     def show_reminder(self):
         """
         THE BIG MOMENT! Show a spectacular, impossible-to-ignore reminder window
@@ -436,29 +539,7 @@ class LumbarReminderApp:
         canvas.pack(fill='both', expand=True)
         
         # Create eye-catching gradient (red to orange to purple to dark)
-        for i in range(400):
-            ratio = i / 400
-            
-            if ratio < 0.3:
-                # Red to orange section (urgent feel)
-                factor = ratio / 0.3
-                r = int(255 - (255 - 220) * factor)  # Red to orange
-                g = int(71 + (140 - 71) * factor)
-                b = int(87 + (0 - 87) * factor)
-            elif ratio < 0.7:
-                # Orange to purple section (transition)
-                factor = (ratio - 0.3) / 0.4
-                r = int(220 - (220 - 156) * factor)  # Orange to purple
-                g = int(140 - (140 - 39) * factor)
-                b = int(0 + (176 - 0) * factor)
-            else:
-                # Purple to dark section (fade to bottom)
-                factor = (ratio - 0.7) / 0.3
-                r = int(156 - (156 - 15) * factor)   # Purple to dark
-                g = int(39 - (39 - 15) * factor)
-                b = int(176 - (176 - 35) * factor)
-            
-            color = f"#{r:02x}{g:02x}{b:02x}"
+        for i, color in enumerate(alert_gradient(400)):
             canvas.create_line(0, i, 500, i, fill=color)
         
         # === ADD GLOWING BORDER EFFECT ===
@@ -520,25 +601,39 @@ class LumbarReminderApp:
         )
         inst_title.pack(pady=(0, 10))
         
-        # List of specific actions to take (evidence-based health advice)
+        # List of specific actions to take (evidence-based health advice),
+        # each with the name of its demo animation in assets/exercises/
         health_actions = [
-            "🚶 Stand up and walk for 2-3 minutes",     # Movement
-            "🤸 Perform gentle back stretches",          # Flexibility  
-            "💆 Roll your shoulders backwards",          # Posture reset
-            "🧘 Take 3 deep breaths and relax"          # Stress relief
+            ('walk', "🚶 Stand up and walk for 2-3 minutes"),          # Movement
+            ('back_stretch', "🤸 Perform gentle back stretches"),      # Flexibility  
+            ('shoulder_roll', "💆 Roll your shoulders backwards"),     # Posture reset
+            ('deep_breath', "🧘 Take 3 deep breaths and relax")       # Stress relief
         ]
         
+        # === EXERCISE DEMO ===
+        # The warning icon turns into an animated demo when one is available;
+        # each popup starts with the next exercise, and clicking an action shows its demo
+        player = ExercisePlayer(alert_icon, self.frame_cache)
+        
+        def show_exercise(exercise):
+            player.play(find_animation(exercise))  # Keeps the ⚠️ if there's no demo
+        
         # Display each action with clear formatting
-        for action in health_actions:
+        for exercise, action in health_actions:
             action_label = tk.Label(
                 instructions,
                 text=action,
                 font=("Consolas", 11),
                 fg='#ffffff',
                 bg='#1a1a2e',
-                anchor='w'              # Left-align text
+                anchor='w',             # Left-align text
+                cursor='hand2'          # Clickable: shows this exercise's demo
             )
             action_label.pack(anchor='w', pady=2)
+            action_label.bind('<Button-1>', lambda event, name=exercise: show_exercise(name))
+        
+        show_exercise(health_actions[self.exercise_index % len(health_actions)][0])
+        self.exercise_index += 1
         
         # === ACTION BUTTONS ===
         # Give users clear options for what to do next
@@ -601,6 +696,7 @@ class LumbarReminderApp:
         This is helpful when they're in the middle of something important.
         """
         window.destroy()  # Close the current reminder
+        self.diagnostics.info('reminder_snoozed', minutes=5)
         
         if self.is_running:
             # Set next reminder for 5 minutes from now (instead of full interval)
@@ -622,6 +718,7 @@ class LumbarReminderApp:
                 window.after(1000, lambda: self.update_countdown(window))
             else:
                 # Time's up! Close the window automatically
+                self.diagnostics.info('reminder_auto_closed')
                 window.destroy()
     
     def pulse_reminder_window(self, window, canvas):
@@ -650,21 +747,71 @@ class LumbarReminderApp:
 
                 # Schedule next color change in 0.5 seconds
                 window.after(500, lambda: self.pulse_reminder_window(window, canvas))
-        except Exception:
-            # If window is closed or error occurs, just stop the animation
+        except tk.TclError:
+            # Window was closed between checks - just stop the animation
             pass
+        except Exception:
+            # Anything else is a real bug: stop the animation but record it
+            self.diagnostics.exception('pulse_animation_failed')
 
     def update_clock(self):
         """
         Update the real-time display elements.
         This method is called periodically to keep the interface current.
         """
+        self.refresh_clock()
+        
+        # Schedule next update in 1 second
+        self.root.after(1000, self.update_clock)
+    
+    def refresh_clock(self):
+        """
+        Apply any pending policy and refresh the countdown (once a second).
+        """
+        # Apply any policy that arrived from the policy server
+        if self.pending_policy is not None:
+            policy, self.pending_policy = self.pending_policy, None
+            self.apply_policy(policy)
+        
         # Update the status display if running
         if self.is_running:
             self.update_status()
+    
+    def receive_policy(self, policy, version):
+        """
+        Called from the policy client's thread when a new policy arrives.
+        The actual update happens on the Tk thread in update_clock().
+        """
+        self.pending_policy = policy
+    
+    def apply_policy(self, policy):
+        """
+        Apply a centrally managed policy to the running app.
+        The interval slider follows the admin's setting, and if protection is
+        running the next reminder is brought forward when the new interval is shorter.
+        """
+        interval = policy.get('reminder_interval')
+        if interval is not None:
+            try:
+                interval = max(5, min(120, int(interval)))  # Same limits as the slider
+            except (ValueError, TypeError, OverflowError):
+                self.diagnostics.exception('policy_interval_invalid', value=interval)
+                interval = None
+        if interval is not None:
+            self.reminder_interval.set(interval)
+            self.update_time_display()
+            
+            if self.is_running and self.next_reminder_time:
+                sooner = datetime.now() + timedelta(minutes=interval)
+                self.next_reminder_time = min(self.next_reminder_time, sooner)
+                self.update_status()
         
-        # Schedule next update in 1 second
-        self.root.after(1000, self.update_clock)
+        try:
+            self.suppression.set_quiet_windows(parse_quiet_hours(policy.get('quiet_hours')))
+        except ValueError:
+            self.diagnostics.exception('policy_quiet_hours_invalid')
+        
+        self.diagnostics.info('policy_applied', interval=interval, quiet_hours=policy.get('quiet_hours'))
     
     def update_time_display(self, value=None):
         """
@@ -739,10 +886,32 @@ class LumbarReminderApp:
         except ImportError:
             # Fallback for non-Windows systems
             try:
-                import os
-                os.system('echo \a')  # Terminal bell sound
-            except:
-                pass  # Silent if no sound available
+                self.root.bell()  # Bell on this window's own display
+            except Exception:
+                # Silent if no sound available
+                self.diagnostics.exception('bell_fallback_failed')
+        except RuntimeError:
+            # winsound exists but the beep device is unavailable
+            self.diagnostics.exception('winsound_beep_failed')
+
+
+def load_schedule_settings(app, working_hours=None, calendars=()):
+    """
+    Give an app its working hours and calendars so reminders skip busy times.
+    
+    Args:
+        app: The LumbarReminderApp to configure
+        working_hours: Text like "Mon-Fri 09:00-17:30" (raises ValueError if unreadable)
+        calendars: Paths of ICS calendar files
+    """
+    if working_hours:
+        app.suppression.set_working_hours(parse_working_hours(working_hours))
+    for calendar_path in calendars:
+        try:
+            count = app.suppression.load_ics(calendar_path)
+            app.diagnostics.info('calendar_loaded', path=calendar_path, events=count)
+        except OSError:
+            app.diagnostics.exception('calendar_load_failed', path=calendar_path)
 
 
 def main():
@@ -750,14 +919,55 @@ def main():
     Main function to start the Lumbar Spine Care Reminder application.
     Creates the main window and starts the GUI event loop.
     """
+    # Optional command-line settings
+    parser = argparse.ArgumentParser(description='Lumbar Spine Care Reminder')
+    parser.add_argument('--policy-server', metavar='HOST[:PORT]',
+                        help='Follow the reminder policy published by this server')
+    parser.add_argument('--calendar', metavar='FILE.ics', action='append', default=[],
+                        help='Hold reminders during events in this calendar (can be repeated)')
+    parser.add_argument('--working-hours', metavar='HOURS',
+                        help='Only remind during these hours, e.g. "Mon-Fri 09:00-17:30"')
+    args = parser.parse_args()
+    
+    # Start the diagnostics log first so even startup problems are recorded
+    diagnostics = DiagnosticsLog()
+    diagnostics.start()
+    
     # Create the main application window
     root = tk.Tk()
+    diagnostics.install_crash_hooks(root)
+    
+    # Ctrl+Shift+D writes the whole diagnostics buffer to disk on demand
+    root.bind('<Control-D>', lambda event: diagnostics.dump('user_request'))
     
     # Create and start the application
-    app = LumbarReminderApp(root)
+    app = LumbarReminderApp(root, diagnostics=diagnostics)
+    diagnostics.info('app_started')
+    
+    # Load working hours and calendars so reminders skip busy times
+    try:
+        load_schedule_settings(app, args.working_hours, args.calendar)
+    except ValueError as error:
+        parser.error(f"could not understand --working-hours {args.working_hours!r}: {error}")
+    
+    # Follow the central policy, starting from the cached copy in case the server is down
+    policy_client = None
+    if args.policy_server:
+        host, _, port = args.policy_server.partition(':')
+        policy_client = PolicyClient(host, int(port or DEFAULT_PORT),
+                                     on_policy=app.receive_policy, diagnostics=diagnostics)
+        if policy_client.policy:
+            app.apply_policy(policy_client.policy)
+        policy_client.start()
     
     # Start the GUI event loop
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        if policy_client is not None:
+            policy_client.stop()
+        diagnostics.info('app_exited')
+        diagnostics.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,645 @@
+"""
+📡 Central Reminder Policy for the Lumbar Spine Care Reminder
+
+Lets an admin set the reminder interval and quiet hours for a whole
+department from one place. A small policy server keeps a long-lived
+connection to every client and pushes versioned changes (deltas) the
+moment the policy file is edited. Clients cache the last policy they saw,
+so the app starts with the right settings even when the server is down.
+
+Wire protocol (both directions):
+    Every message is a 4-byte big-endian length followed by UTF-8 JSON.
+
+    client -> server   {"type": "subscribe", "version": 7}
+    server -> client   {"type": "snapshot", "version": 9, "policy": {...}}
+    server -> client   {"type": "delta", "version": 10, "changes": {...}}
+    server -> client   {"type": "ping"}
+
+    A value of null in "changes" means the setting was removed.
+
+Usage:
+    # On the server (edit department.json to push changes)
+    python policy.py serve --policy-file department.json --port 8765
+
+    # On each desk
+    python lumbar_reminder.py --policy-server policy-host:8765
+"""
+
+import argparse
+import collections
+import json
+import os
+import queue
+import selectors
+import socket
+import struct
+import threading
+import time
+
+from diagnostics import DEFAULT_LOG_DIR
+
+# === DEFAULTS ===
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_FILE = os.path.join(DEFAULT_LOG_DIR, 'policy.json')
+
+# Settings a policy is allowed to control (anything else is ignored)
+KNOWN_SETTINGS = ('reminder_interval', 'quiet_hours')
+
+_HEADER = struct.Struct('>I')
+MAX_FRAME_SIZE = 1024 * 1024  # Refuse anything bigger than 1 MB
+
+
+class PolicyProtocolError(Exception):
+    """Raised when the other side sends something we can't understand."""
+
+
+# === FRAMING HELPERS ===
+
+def encode_frame(message):
+    """
+    Turn a message dict into bytes ready to send (length prefix + JSON).
+    """
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    return _HEADER.pack(len(payload)) + payload
+
+
+def decode_frames(buffer):
+    """
+    Pull every complete message out of a receive buffer.
+
+    Args:
+        buffer: A bytearray of received data; complete frames are removed from it
+
+    Returns:
+        A list of decoded message dicts (possibly empty)
+    """
+    messages = []
+    while len(buffer) >= _HEADER.size:
+        (length,) = _HEADER.unpack_from(buffer)
+        if length > MAX_FRAME_SIZE:
+            raise PolicyProtocolError(f"frame of {length} bytes is too large")
+        end = _HEADER.size + length
+        if len(buffer) < end:
+            break  # Wait for the rest of this frame
+        messages.append(json.loads(bytes(buffer[_HEADER.size:end]).decode('utf-8')))
+        del buffer[:end]
+    return messages
+
+
+def apply_changes(policy, changes):
+    """
+    Return a copy of policy with a delta applied (null values remove a setting).
+    """
+    updated = dict(policy)
+    for key, value in changes.items():
+        if value is None:
+            updated.pop(key, None)
+        else:
+            updated[key] = value
+    return updated
+
+
+def diff_policies(old, new):
+    """
+    Work out the delta that turns policy old into policy new.
+    """
+    changes = {key: value for key, value in new.items() if old.get(key) != value}
+    changes.update({key: None for key in old if key not in new})
+    return changes
+
+
+class PolicyServer:
+    """
+    Single-threaded fan-out server built on selectors.
+
+    Each delta is encoded once and the same bytes are queued for every
+    subscriber, so pushing a change costs one JSON encode plus one
+    non-blocking send per client. Clients that fall too far behind are
+    disconnected; they reconnect and catch up from a snapshot.
+    """
+
+    def __init__(self, host='0.0.0.0', port=DEFAULT_PORT, policy=None,
+                 history_size=64, ping_interval=30.0, max_backlog=256 * 1024):
+        """
+        Args:
+            host: Interface to listen on
+            port: TCP port to listen on (0 picks a free one)
+            policy: Starting policy dict
+            history_size: How many recent deltas to keep for catching clients up
+            ping_interval: Seconds between keep-alive pings
+            max_backlog: Bytes of unsent data allowed per client before dropping it
+        """
+        self.host = host
+        self.port = port
+        self.policy = dict(policy or {})
+        # Start from the clock so versions keep increasing across server restarts
+        self.version = int(time.time())
+        self.ping_interval = ping_interval
+        self.max_backlog = max_backlog
+
+        # Recent deltas as (version, frame bytes) so reconnecting clients can catch up cheaply
+        self._history = collections.deque(maxlen=history_size)
+
+        self._selector = selectors.DefaultSelector()
+        self._clients = {}  # socket -> _Subscriber
+        self._listener = None
+        self._lock = threading.Lock()
+        self._outbox = queue.Queue()  # Frames waiting to be fanned out
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._running = False
+        self._thread = None
+
+    # === PUBLIC API (safe to call from any thread) ===
+
+    @property
+    def subscriber_count(self):
+        return len(self._clients)
+
+    def publish(self, changes):
+        """
+        Apply a change to the policy and push it to every subscriber.
+
+        Args:
+            changes: Dict of settings to change (None removes a setting)
+
+        Returns:
+            The new policy version, or the current one if nothing changed
+        """
+        with self._lock:
+            changes = {key: value for key, value in changes.items()
+                       if self.policy.get(key) != value}
+            if not changes:
+                return self.version
+            self.policy = apply_changes(self.policy, changes)
+            self.version += 1
+            frame = encode_frame({'type': 'delta', 'version': self.version, 'changes': changes})
+            self._history.append((self.version, frame))
+            self._outbox.put(frame)
+        self._wake()
+        return self.version
+
+    def replace_policy(self, policy):
+        """
+        Swap in a whole new policy, publishing only what actually changed.
+        """
+        with self._lock:
+            changes = diff_policies(self.policy, policy)
+        return self.publish(changes)
+
+    def start(self):
+        """
+        Start listening and run the fan-out loop on a background thread.
+        """
+        self.bind()
+        self._thread = threading.Thread(target=self.serve_forever, name='policy-server', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the fan-out loop and close every connection.
+        """
+        self._running = False
+        self._wake()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # === EVENT LOOP ===
+
+    def bind(self):
+        """
+        Open the listening socket (port 0 is replaced by the real port).
+        """
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((self.host, self.port))
+        self._listener.listen(1024)
+        self._listener.setblocking(False)
+        self.port = self._listener.getsockname()[1]
+        self._selector.register(self._listener, selectors.EVENT_READ, 'accept')
+        self._wake_reader.setblocking(False)
+        self._selector.register(self._wake_reader, selectors.EVENT_READ, 'wake')
+
+    def serve_forever(self, tick=None):
+        """
+        Run the event loop until stop() is called.
+
+        Args:
+            tick: Optional function called about once a second (used for file watching)
+        """
+        self._running = True
+        next_ping = time.monotonic() + self.ping_interval
+        try:
+            while self._running:
+                for key, events in self._selector.select(timeout=1.0):
+                    if key.data == 'accept':
+                        self._accept()
+                    elif key.data == 'wake':
+                        self._drain_wake()
+                    else:
+                        if events & selectors.EVENT_READ:
+                            self._read(key.fileobj)
+                        if events & selectors.EVENT_WRITE and key.fileobj in self._clients:
+                            self._write(key.fileobj)
+                self._fan_out()
+
+                if time.monotonic() >= next_ping:
+                    self._outbox.put(encode_frame({'type': 'ping'}))
+                    self._fan_out()
+                    next_ping = time.monotonic() + self.ping_interval
+                if tick is not None:
+                    tick()
+        finally:
+            for sock in list(self._clients):
+                self._drop(sock)
+            self._selector.close()
+            self._listener.close()
+
+    def _wake(self):
+        """Nudge the event loop so it notices new work straight away."""
+        try:
+            self._wake_writer.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass  # Already awake (buffer full) or shutting down
+
+    def _drain_wake(self):
+        try:
+            while self._wake_reader.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _accept(self):
+        """Accept every pending connection (there may be many at once)."""
+        while True:
+            try:
+                sock, _ = self._listener.accept()
+            except BlockingIOError:
+                return
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._clients[sock] = _Subscriber()
+            self._selector.register(sock, selectors.EVENT_READ, 'client')
+
+    def _read(self, sock):
+        """Handle incoming data from a client (only subscribe messages matter)."""
+        subscriber = self._clients[sock]
+        try:
+            data = sock.recv(4096)
+            if not data:
+                raise ConnectionError('client closed the connection')
+            subscriber.inbox.extend(data)
+            messages = decode_frames(subscriber.inbox)
+        except (OSError, ValueError, PolicyProtocolError):
+            self._drop(sock)
+            return
+
+        for message in messages:
+            # Drop a client that sends nonsense; it must not stop the fan-out for everyone
+            if not isinstance(message, dict):
+                self._drop(sock)
+                return
+            version = message.get('version')
+            if version is not None and not _is_whole_number(version):
+                self._drop(sock)
+                return
+            if message.get('type') == 'subscribe':
+                self._catch_up(sock, subscriber, version or 0)
+
+    def _catch_up(self, sock, subscriber, known_version):
+        """
+        Bring a (re)connecting client up to date: replay recent deltas if we
+        still have them, otherwise send a full snapshot.
+        """
+        with self._lock:
+            if known_version == self.version:
+                frames = []
+            elif self._history and known_version >= self._history[0][0] - 1 and known_version < self.version:
+                frames = [frame for version, frame in self._history if version > known_version]
+            else:
+                frames = [encode_frame({'type': 'snapshot', 'version': self.version, 'policy': self.policy})]
+        subscriber.subscribed = True
+        for frame in frames:
+            self._send(sock, subscriber, frame)
+
+    def _fan_out(self):
+        """Send every queued frame to every subscribed client."""
+        while True:
+            try:
+                frame = self._outbox.get_nowait()
+            except queue.Empty:
+                return
+            for sock, subscriber in list(self._clients.items()):
+                if subscriber.subscribed:
+                    self._send(sock, subscriber, frame)
+
+    def _send(self, sock, subscriber, frame):
+        """
+        Send a frame without blocking; whatever doesn't fit now is kept
+        in the client's outbox and finished when the socket is writable.
+        """
+        if subscriber.outbox:
+            subscriber.outbox.extend(frame)
+        else:
+            try:
+                sent = sock.send(frame)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self._drop(sock)
+                return
+            if sent == len(frame):
+                return
+            subscriber.outbox.extend(frame[sent:])
+            self._selector.modify(sock, selectors.EVENT_READ | selectors.EVENT_WRITE, 'client')
+
+        if len(subscriber.outbox) > self.max_backlog:
+            self._drop(sock)  # Too slow; it will reconnect and get a snapshot
+
+    def _write(self, sock):
+        """Continue sending a client's queued data."""
+        subscriber = self._clients[sock]
+        try:
+            sent = sock.send(subscriber.outbox)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._drop(sock)
+            return
+        del subscriber.outbox[:sent]
+        if not subscriber.outbox:
+            self._selector.modify(sock, selectors.EVENT_READ, 'client')
+
+    def _drop(self, sock):
+        """Forget about a client and close its connection."""
+        if self._clients.pop(sock, None) is None:
+            return
+        try:
+            self._selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        sock.close()
+
+
+class _Subscriber:
+    """Per-connection buffers kept by the server."""
+
+    __slots__ = ('inbox', 'outbox', 'subscribed')
+
+    def __init__(self):
+        self.inbox = bytearray()
+        self.outbox = bytearray()
+        self.subscribed = False
+
+
+class PolicyClient:
+    """
+    Keeps a long-lived connection to the policy server on a background
+    thread, reconnecting with back-off whenever it drops.
+
+    The last policy received is cached on disk so the app can start with
+    it even when the server is unreachable.
+    """
+
+    def __init__(self, host, port=DEFAULT_PORT, cache_path=DEFAULT_CACHE_FILE,
+                 on_policy=None, diagnostics=None, timeout=90.0):
+        """
+        Args:
+            host: Policy server host name
+            port: Policy server port
+            cache_path: Where the last known policy is stored (None disables caching)
+            on_policy: Called as on_policy(policy, version) from the client thread
+            diagnostics: Optional DiagnosticsLog for connection events
+            timeout: Seconds of silence before the connection is considered dead
+        """
+        self.host = host
+        self.port = port
+        self.cache_path = cache_path
+        self.on_policy = on_policy
+        self.diagnostics = diagnostics
+        self.timeout = timeout
+
+        self.policy = {}
+        self.version = 0
+        self._running = False
+        self._sock = None
+        self._thread = None
+
+        self.load_cache()
+
+    def load_cache(self):
+        """
+        Load the last policy saved on disk, if there is one.
+        """
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, encoding='utf-8') as cache_file:
+                cached = json.load(cache_file)
+            self.policy = dict(cached.get('policy', {}))
+            self.version = int(cached.get('version', 0))
+        except (OSError, ValueError, TypeError, AttributeError):
+            self._record('warning', 'policy_cache_unreadable', path=self.cache_path)
+
+    def save_cache(self):
+        """
+        Save the current policy to disk atomically (write then rename).
+        """
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        temp_path = self.cache_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as cache_file:
+            json.dump({'version': self.version, 'policy': self.policy}, cache_file)
+        os.replace(temp_path, self.cache_path)
+
+    def start(self):
+        """
+        Start the background connection thread.
+        """
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='policy-client', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Close the connection and stop reconnecting.
+        """
+        self._running = False
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _run(self):
+        """Connect, listen for updates, and reconnect with back-off on failure."""
+        delay = 1.0
+        while self._running:
+            try:
+                self._listen()
+                delay = 1.0  # Clean disconnect, retry promptly
+            except (OSError, ValueError, KeyError, TypeError, PolicyProtocolError) as error:
+                # A malformed frame from the server counts as a broken connection
+                self._record('warning', 'policy_connection_lost', error=repr(error), retry_in=delay)
+            if self._running:
+                time.sleep(delay)
+                delay = min(delay * 2, 60.0)
+
+    def _listen(self):
+        """One connection: subscribe, then apply messages until it closes."""
+        with socket.create_connection((self.host, self.port), timeout=10.0) as sock:
+            self._sock = sock
+            try:
+                sock.settimeout(self.timeout)
+                sock.sendall(encode_frame({'type': 'subscribe', 'version': self.version}))
+                self._record('info', 'policy_connected', host=self.host, port=self.port, version=self.version)
+
+                buffer = bytearray()
+                while self._running:
+                    data = sock.recv(65536)
+                    if not data:
+                        return
+                    buffer.extend(data)
+                    for message in decode_frames(buffer):
+                        self.handle_message(message)
+            finally:
+                self._sock = None
+
+    def handle_message(self, message):
+        """
+        Apply one message from the server to our copy of the policy.
+        """
+        if not isinstance(message, dict):
+            raise PolicyProtocolError(f"expected a JSON object, got {type(message).__name__}")
+        kind = message.get('type')
+        if kind in ('snapshot', 'delta') and not _is_whole_number(message.get('version')):
+            raise PolicyProtocolError(f"bad policy version {message.get('version')!r}")
+        if kind == 'snapshot':
+            if not isinstance(message.get('policy'), dict):
+                raise PolicyProtocolError(f"snapshot policy is not an object: {message.get('policy')!r}")
+            self.policy = dict(message['policy'])
+        elif kind == 'delta':
+            if not isinstance(message.get('changes'), dict):
+                raise PolicyProtocolError(f"delta changes are not an object: {message.get('changes')!r}")
+            if message['version'] <= self.version:
+                return  # Already have it (replayed after a reconnect)
+            self.policy = apply_changes(self.policy, message['changes'])
+        else:
+            return  # Pings just keep the connection alive
+
+        self.version = message['version']
+        self._record('info', 'policy_updated', version=self.version)
+        try:
+            self.save_cache()
+        except OSError:
+            self._record('warning', 'policy_cache_write_failed', path=self.cache_path)
+        if self.on_policy is not None:
+            self.on_policy(dict(self.policy), self.version)
+
+    def _record(self, level, event, **fields):
+        if self.diagnostics is not None:
+            getattr(self.diagnostics, level)(event, **fields)
+
+
+def _is_whole_number(value):
+    """True for a plain int (JSON true/false arrive as bools, which are ints too)."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_quiet_hours(value):
+    """
+    Turn a policy's quiet_hours setting into (start, end) minute-of-day pairs.
+
+    Args:
+        value: A list of ["HH:MM", "HH:MM"] pairs; a window may wrap past midnight
+
+    Returns:
+        A list of (start_minute, end_minute) tuples
+
+    Raises:
+        ValueError: If value is not a list of such pairs
+    """
+    if not value:
+        return []
+    if not isinstance(value, list):
+        raise ValueError(f"quiet_hours must be a list of [\"HH:MM\", \"HH:MM\"] pairs, not {value!r}")
+    windows = []
+    for pair in value:
+        if not isinstance(pair, list) or len(pair) != 2:
+            raise ValueError(f"quiet_hours entry must be a [\"HH:MM\", \"HH:MM\"] pair, not {pair!r}")
+        windows.append(tuple(_minute_of_day(text) for text in pair))
+    return windows
+
+
+def _minute_of_day(text):
+    """Turn "HH:MM" into minutes after midnight."""
+    hour, colon, minute = text.partition(':') if isinstance(text, str) else ('', '', '')
+    if not (colon and hour.isdigit() and minute.isdigit() and int(hour) < 24 and int(minute) < 60):
+        raise ValueError(f"expected a time like \"22:30\", not {text!r}")
+    return int(hour) * 60 + int(minute)
+
+
+def load_policy_file(path):
+    """
+    Read a department policy JSON file, keeping only known settings.
+
+    Raises:
+        ValueError: If a known setting has the wrong type, so a bad edit is
+            never published to the clients
+    """
+    with open(path, encoding='utf-8') as policy_file:
+        policy = json.load(policy_file)
+    if not isinstance(policy, dict):
+        raise ValueError(f"{path} must contain a JSON object")
+    policy = {key: value for key, value in policy.items() if key in KNOWN_SETTINGS}
+
+    interval = policy.get('reminder_interval')
+    if interval is not None and not _is_whole_number(interval):
+        raise ValueError(f"reminder_interval must be a whole number of minutes, not {interval!r}")
+    parse_quiet_hours(policy.get('quiet_hours'))
+    return policy
+
+
+def serve(policy_file, host='0.0.0.0', port=DEFAULT_PORT):
+    """
+    Run a policy server that re-publishes the policy file whenever it changes.
+    """
+    server = PolicyServer(host, port, policy=load_policy_file(policy_file))
+    server.bind()
+    last_mtime = os.path.getmtime(policy_file)
+
+    def watch_file():
+        nonlocal last_mtime
+        try:
+            mtime = os.path.getmtime(policy_file)
+            if mtime != last_mtime:
+                last_mtime = mtime
+                version = server.replace_policy(load_policy_file(policy_file))
+                print(f"Policy reloaded (version {version}, {server.subscriber_count} subscribers)")
+        except (OSError, ValueError) as error:
+            print(f"Could not reload {policy_file}: {error}")
+
+    print(f"Serving {policy_file} on {host}:{server.port}")
+    server.serve_forever(tick=watch_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Central reminder policy server')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = subcommands.add_parser('serve', help='Serve a policy file to subscribed clients')
+    serve_parser.add_argument('--policy-file', required=True, help='JSON file with the department policy')
+    serve_parser.add_argument('--host', default='0.0.0.0')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            serve(args.policy_file, args.host, args.port)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
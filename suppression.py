@@ -0,0 +1,548 @@
+"""
+🤫 Quiet Hours and Calendar-Aware Suppression
+
+Keeps reminders from popping up in the middle of meetings, over lunch or
+after hours. Busy time comes from three places:
+
+- Working hours (anything outside them is quiet)
+- Recurring daily quiet windows (for example the policy's quiet_hours)
+- Events in local ICS calendar files, read line by line so even very
+  large calendars never have to sit in memory as one big string
+
+All busy time for the next couple of weeks is stored in an interval tree,
+so "is now suppressed?" and "when is the next free slot?" are O(log n)
+lookups even with tens of thousands of events.
+
+Usage:
+    engine = SuppressionEngine()
+    engine.set_working_hours(parse_working_hours('Mon-Fri 09:00-17:30'))
+    engine.load_ics('work_calendar.ics')
+    if engine.is_suppressed(datetime.now()):
+        next_time = engine.next_allowed(datetime.now())
+"""
+
+import bisect
+import collections
+from datetime import datetime, timedelta, timezone
+
+try:
+    from zoneinfo import ZoneInfo  # Python 3.9+
+except ImportError:
+    ZoneInfo = None
+
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+_DAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+# Windows are aligned to this date so every moment always maps to the same one
+_WINDOW_EPOCH = datetime(2000, 1, 3)
+
+
+class IntervalTree:
+    """
+    Static interval tree over half-open [start, end) intervals.
+
+    The intervals are kept sorted by start time and viewed as an implicit
+    balanced binary tree (the middle element of each range is the node),
+    with every node remembering the latest end time below it. Overlapping
+    intervals are also merged into disjoint busy blocks, so membership and
+    "next free moment" queries are a single binary search.
+    """
+
+    def __init__(self, intervals=()):
+        """
+        Args:
+            intervals: Iterable of (start, end, label) with numeric start/end
+        """
+        ordered = sorted((start, end, label) for start, end, label in intervals if end > start)
+        self.starts = [item[0] for item in ordered]
+        self.ends = [item[1] for item in ordered]
+        self.labels = [item[2] for item in ordered]
+        self._max_end = list(self.ends)
+        self._build(0, len(ordered))
+
+        # === MERGED BUSY BLOCKS ===
+        self.block_starts = []
+        self.block_ends = []
+        for start, end in zip(self.starts, self.ends):
+            if self.block_ends and start <= self.block_ends[-1]:
+                self.block_ends[-1] = max(self.block_ends[-1], end)
+            else:
+                self.block_starts.append(start)
+                self.block_ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _build(self, lo, hi):
+        """Fill in the latest end time below every node."""
+        if lo >= hi:
+            return float('-inf')
+        mid = (lo + hi) // 2
+        latest = max(self.ends[mid], self._build(lo, mid), self._build(mid + 1, hi))
+        self._max_end[mid] = latest
+        return latest
+
+    def contains(self, point):
+        """
+        Is the point inside any interval?
+        """
+        index = bisect.bisect_right(self.block_starts, point) - 1
+        return index >= 0 and point < self.block_ends[index]
+
+    def next_free(self, point):
+        """
+        Return the earliest moment at or after point that no interval covers.
+        """
+        index = bisect.bisect_right(self.block_starts, point) - 1
+        if index >= 0 and point < self.block_ends[index]:
+            return self.block_ends[index]
+        return point
+
+    def overlapping(self, point):
+        """
+        Return the labels of every interval containing point.
+        """
+        found = []
+        stack = [(0, len(self.starts))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] <= point:
+                continue  # Nothing in this subtree reaches the point
+            stack.append((lo, mid))
+            if self.starts[mid] <= point:
+                if point < self.ends[mid]:
+                    found.append(self.labels[mid])
+                stack.append((mid + 1, hi))
+        return found
+
+
+# === ICS CALENDAR PARSING ===
+
+def iter_ics_events(lines):
+    """
+    Stream VEVENT blocks out of an ICS file one at a time.
+
+    Handles folded lines (continuations start with a space or tab) and
+    keeps only the properties we care about.
+
+    Args:
+        lines: Any iterable of text lines, such as an open file
+
+    Yields:
+        Dicts mapping property name to (params dict, value)
+    """
+    wanted = ('DTSTART', 'DTEND', 'DURATION', 'RRULE', 'EXDATE', 'TRANSP', 'STATUS', 'SUMMARY')
+    event = None
+    pending = None
+
+    def handle(line):
+        nonlocal event
+        if line == 'BEGIN:VEVENT':
+            event = {}
+        elif line == 'END:VEVENT':
+            if event is not None:
+                finished, event = event, None
+                return finished
+        elif event is not None:
+            name_part, _, value = line.partition(':')
+            name, *raw_params = name_part.split(';')
+            name = name.upper()
+            if name in wanted:
+                params = dict(param.partition('=')[::2] for param in raw_params)
+                if name == 'EXDATE' and name in event:
+                    value = event[name][1] + ',' + value  # EXDATE may repeat
+                event[name] = (params, value)
+        return None
+
+    for raw in lines:
+        line = raw.rstrip('\r\n')
+        if line[:1] in (' ', '\t'):
+            if pending is not None:
+                pending += line[1:]
+            continue
+        if pending is not None:
+            finished = handle(pending)
+            if finished is not None:
+                yield finished
+        pending = line
+    if pending is not None:
+        finished = handle(pending)
+        if finished is not None:
+            yield finished
+
+
+def parse_ics_datetime(params, value, local=True):
+    """
+    Convert an ICS date or date-time into a datetime.
+
+    Args:
+        params: Property parameters (VALUE, TZID)
+        value: The raw ICS value
+        local: Convert to naive local time (otherwise zoned times keep their zone)
+
+    Returns:
+        (datetime, is_all_day)
+    """
+    # Sliced by hand: strptime is far too slow for calendars with many thousands of events
+    value = value.strip()
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8])), True
+
+    if len(value) < 15 or value[8] != 'T':
+        raise ValueError(f"not an ICS date-time: {value!r}")
+    moment = datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                      int(value[9:11]), int(value[11:13]), int(value[13:15]))
+    if value.endswith('Z'):
+        moment = moment.replace(tzinfo=timezone.utc)
+    elif 'TZID' in params and ZoneInfo is not None:
+        try:
+            moment = moment.replace(tzinfo=ZoneInfo(params['TZID'].strip('"')))
+        except (KeyError, ValueError):
+            pass  # Unknown zone name: treat as local time
+    return (to_local(moment) if local else moment), False
+
+
+def to_local(moment):
+    """
+    Turn a zoned datetime into naive local time (naive ones are already local).
+    """
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
+
+
+def _same_frame(moment, reference):
+    """Express moment in the same kind of time (zoned or naive local) as reference."""
+    if reference.tzinfo is not None:
+        return moment.astimezone(reference.tzinfo)  # Naive values are taken as local
+    return to_local(moment)
+
+
+def parse_ics_duration(value):
+    """
+    Parse an ICS DURATION such as PT30M, PT1H30M or P1D into a timedelta.
+    """
+    sign = -1 if value.startswith('-') else 1
+    value = value.lstrip('+-').lstrip('P')
+    days_part, _, time_part = value.partition('T')
+    total = timedelta()
+    number = ''
+    for char in days_part:
+        if char.isdigit():
+            number += char
+        else:
+            total += timedelta(weeks=int(number)) if char == 'W' else timedelta(days=int(number))
+            number = ''
+    units = {'H': 'hours', 'M': 'minutes', 'S': 'seconds'}
+    for char in time_part:
+        if char.isdigit():
+            number += char
+        else:
+            total += timedelta(**{units[char]: int(number)})
+            number = ''
+    return sign * total
+
+
+class RecurringEvent:
+    """
+    A calendar event with a simple RRULE (DAILY or WEEKLY, with INTERVAL,
+    COUNT, UNTIL and BYDAY). Occurrences are only generated on demand for
+    the time range the engine is currently looking at.
+
+    Repeats are stepped in the event's own time zone, so a 09:30 Berlin
+    meeting stays at 09:30 Berlin time across daylight-saving changes.
+    """
+
+    __slots__ = ('start', 'length', 'frequency', 'interval', 'count', 'until', 'weekdays', 'exdates', 'label')
+
+    def __init__(self, start, length, rule, exdates, label):
+        self.start = start
+        self.length = length
+        self.label = label
+        self.exdates = exdates
+
+        parts = dict(part.partition('=')[::2] for part in rule.split(';') if part)
+        self.frequency = parts.get('FREQ', '').upper()
+        self.interval = int(parts.get('INTERVAL', 1))
+        self.count = int(parts['COUNT']) if 'COUNT' in parts else None
+        self.until = None
+        if 'UNTIL' in parts:
+            self.until = _same_frame(parse_ics_datetime({}, parts['UNTIL'], local=False)[0], start)
+        byday = [day[-2:].upper() for day in parts.get('BYDAY', '').split(',') if day]
+        self.weekdays = sorted(WEEKDAYS.index(day) for day in byday) or [start.weekday()]
+
+    def occurrences(self, window_start, window_end):
+        """
+        Yield (start, end) in naive local time for every occurrence
+        overlapping the window (given in naive local time).
+        """
+        window_start = _same_frame(window_start, self.start)
+        window_end = _same_frame(window_end, self.start)
+        if self.frequency not in ('DAILY', 'WEEKLY'):
+            # Unsupported rule: just block the first occurrence
+            if self.start < window_end and self.start + self.length > window_start:
+                yield to_local(self.start), to_local(self.start + self.length)
+            return
+
+        # Without COUNT we can jump straight to the window instead of
+        # walking through years of past occurrences
+        skip_to = window_start - self.length if self.count is None else self.start
+        produced = 0
+        if self.frequency == 'DAILY':
+            candidates = self._daily(timedelta(days=self.interval), skip_to)
+        else:
+            candidates = self._weekly(skip_to)
+
+        for occurrence in candidates:
+            if self.until is not None and occurrence > self.until:
+                return
+            if occurrence >= window_end:
+                return
+            produced += 1
+            if self.count is not None and produced > self.count:
+                return
+            if occurrence in self.exdates:
+                continue
+            if occurrence + self.length > window_start:
+                yield to_local(occurrence), to_local(occurrence + self.length)
+
+    def _daily(self, step, skip_to):
+        occurrence = self.start
+        if skip_to > occurrence:
+            occurrence += step * ((skip_to - occurrence) // step)
+        while True:
+            yield occurrence
+            occurrence += step
+
+    def _weekly(self, skip_to):
+        week_start = self.start - timedelta(days=self.start.weekday())
+        step = timedelta(weeks=self.interval)
+        if skip_to > week_start + step:
+            week_start += step * ((skip_to - week_start) // step - 1)
+        while True:
+            for weekday in self.weekdays:
+                occurrence = week_start + timedelta(days=weekday)
+                if occurrence >= self.start:
+                    yield occurrence
+            week_start += step
+
+
+# === SETTINGS PARSING ===
+
+def parse_working_hours(text):
+    """
+    Parse working hours such as "Mon-Fri 09:00-17:30, Sat 10:00-14:00".
+
+    Returns:
+        A dict of weekday number (Monday = 0) -> (start_minute, end_minute)
+
+    Raises:
+        ValueError: If a part can't be read, or a day or time range runs backwards
+    """
+    hours = {}
+    for chunk in text.split(','):
+        days, _, span = chunk.strip().partition(' ')
+        start, _, end = span.strip().partition('-')
+        first, _, last = days.lower().partition('-')
+        first_day = _DAY_NAMES.index(first[:3])
+        last_day = _DAY_NAMES.index(last[:3]) if last else first_day
+        if last_day < first_day:
+            raise ValueError(f"day range {days!r} runs backwards (write it Mon-Sun order)")
+        start_minute, end_minute = _minutes(start), _minutes(end)
+        if end_minute <= start_minute:
+            raise ValueError(f"working hours {span.strip()!r} end before they start")
+        for day in range(first_day, last_day + 1):
+            hours[day] = (start_minute, end_minute)
+    return hours
+
+
+def _minutes(text):
+    hour, _, minute = text.strip().partition(':')
+    minutes = int(hour) * 60 + int(minute or 0)
+    if not 0 <= minutes <= 24 * 60:
+        raise ValueError(f"{text.strip()!r} is not a time of day")
+    return minutes
+
+
+class SuppressionEngine:
+    """
+    Decides whether a reminder may be shown right now, and if not, when.
+
+    Calendar events are kept in memory as compact (start, end) pairs and
+    recurring rules. Time is cut into aligned blocks of `horizon_days`, and
+    each interval tree covers one block plus the next, so looking ahead for
+    a free slot rarely needs a new tree. The last few trees are cached.
+    """
+
+    MAX_CACHED_TREES = 4
+
+    def __init__(self, horizon_days=14):
+        self.horizon = timedelta(days=horizon_days)
+        self.working_hours = {}    # weekday -> (start_minute, end_minute); empty = any time
+        self.quiet_windows = []    # (start_minute, end_minute), may wrap past midnight
+        self.events = []           # (start, end, label) one-off calendar events
+        self.recurring = []        # RecurringEvent objects
+        self._trees = collections.OrderedDict()  # block number -> (window_start, window_end, tree)
+
+    # === CONFIGURATION ===
+
+    def set_working_hours(self, hours):
+        self.working_hours = dict(hours)
+        self._trees = collections.OrderedDict()
+
+    def set_quiet_windows(self, windows):
+        self.quiet_windows = list(windows)
+        self._trees = collections.OrderedDict()
+
+    def clear_calendar(self):
+        self.events = []
+        self.recurring = []
+        self._trees = collections.OrderedDict()
+
+    def load_ics(self, path):
+        """
+        Add every busy event from an ICS file. Free (TRANSPARENT) and
+        cancelled events are skipped.
+
+        Returns:
+            The number of events loaded
+        """
+        loaded = 0
+        with open(path, encoding='utf-8', errors='replace') as ics_file:
+            for event in iter_ics_events(ics_file):
+                if self.add_ics_event(event):
+                    loaded += 1
+        self._trees = collections.OrderedDict()
+        return loaded
+
+    def add_ics_event(self, event):
+        """
+        Add one parsed VEVENT (as yielded by iter_ics_events).
+
+        Returns:
+            True if the event blocks time, False if it was skipped
+        """
+        if 'DTSTART' not in event:
+            return False
+        if event.get('TRANSP', ({}, ''))[1].upper() == 'TRANSPARENT':
+            return False
+        if event.get('STATUS', ({}, ''))[1].upper() == 'CANCELLED':
+            return False
+
+        try:
+            start, all_day = parse_ics_datetime(*event['DTSTART'], local=False)
+            if 'DTEND' in event:
+                end = _same_frame(parse_ics_datetime(*event['DTEND'], local=False)[0], start)
+            elif 'DURATION' in event:
+                end = start + parse_ics_duration(event['DURATION'][1])
+            else:
+                end = start + (timedelta(days=1) if all_day else timedelta())
+        except (ValueError, KeyError):
+            return False  # Malformed date: ignore this event
+
+        label = event.get('SUMMARY', ({}, 'Calendar event'))[1]
+        if 'RRULE' in event:
+            exdates = set()
+            if 'EXDATE' in event:
+                params, value = event['EXDATE']
+                for item in value.split(','):
+                    try:
+                        exdates.add(_same_frame(parse_ics_datetime(params, item, local=False)[0], start))
+                    except ValueError:
+                        pass
+            try:
+                self.recurring.append(RecurringEvent(start, end - start, event['RRULE'][1], exdates, label))
+            except (ValueError, KeyError):
+                return False
+        else:
+            self.events.append((to_local(start).timestamp(), to_local(end).timestamp(), label))
+        self._trees = collections.OrderedDict()
+        return True
+
+    # === QUERIES ===
+
+    def is_suppressed(self, moment):
+        """
+        Should a reminder due at this moment be held back?
+        """
+        return self.tree_for(moment)[2].contains(moment.timestamp())
+
+    def reasons(self, moment):
+        """
+        Return the names of everything blocking this moment (for diagnostics).
+        """
+        return self.tree_for(moment)[2].overlapping(moment.timestamp())
+
+    def next_allowed(self, moment, limit_days=366):
+        """
+        Return the earliest moment at or after `moment` when reminders are allowed.
+        Busy time running past the end of a window is followed into the
+        next one, up to limit_days ahead.
+        """
+        give_up = moment + timedelta(days=limit_days)
+        while moment < give_up:
+            _, window_end, tree = self.tree_for(moment)
+            free = datetime.fromtimestamp(tree.next_free(moment.timestamp()))
+            if free < window_end:
+                return max(free, moment)
+            moment = window_end  # Busy until the window edge: look further on
+        return give_up
+
+    # === TREE BUILDING ===
+
+    def tree_for(self, moment):
+        """
+        Return (window_start, window_end, tree) for the window holding moment,
+        building the tree the first time that window is needed.
+        """
+        # Read the cache once: settings may be changed from the Tk thread
+        # while the reminder thread is asking questions
+        trees = self._trees
+        block = (moment - _WINDOW_EPOCH) // self.horizon
+        cached = trees.get(block)
+        if cached is None:
+            window_start = _WINDOW_EPOCH + block * self.horizon
+            window_end = window_start + 2 * self.horizon
+            cached = (window_start, window_end, self._build_tree(window_start, window_end))
+            trees[block] = cached
+            while len(trees) > self.MAX_CACHED_TREES:
+                trees.popitem(last=False)
+        else:
+            trees.move_to_end(block)
+        return cached
+
+    def _build_tree(self, window_start, window_end):
+        """Collect every busy interval in the window into a fresh interval tree."""
+        lo, hi = window_start.timestamp(), window_end.timestamp()
+        intervals = [event for event in self.events if event[0] < hi and event[1] > lo]
+
+        for rule in self.recurring:
+            for start, end in rule.occurrences(window_start, window_end):
+                intervals.append((start.timestamp(), end.timestamp(), rule.label))
+
+        # Start a day early: last night's quiet hours may wrap into the window
+        day = datetime.combine(window_start.date(), datetime.min.time()) - timedelta(days=1)
+        while day < window_end:
+            for start_minute, end_minute in self.quiet_windows:
+                start = day + timedelta(minutes=start_minute)
+                if end_minute <= start_minute:  # Wraps past midnight
+                    end_minute += 24 * 60
+                end = day + timedelta(minutes=end_minute)
+                intervals.append((start.timestamp(), end.timestamp(), 'Quiet hours'))
+
+            if self.working_hours:
+                hours = self.working_hours.get(day.weekday())
+                next_day = day + timedelta(days=1)
+                if hours is None:
+                    intervals.append((day.timestamp(), next_day.timestamp(), 'Outside working hours'))
+                else:
+                    work_start = day + timedelta(minutes=hours[0])
+                    work_end = day + timedelta(minutes=hours[1])
+                    intervals.append((day.timestamp(), work_start.timestamp(), 'Outside working hours'))
+                    intervals.append((work_end.timestamp(), next_day.timestamp(), 'Outside working hours'))
+            day += timedelta(days=1)
+
+        return IntervalTree(intervals)
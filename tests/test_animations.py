@@ -0,0 +1,121 @@
+"""
+Tests for the animation frame cache, with the Tk image calls replaced so
+they run without a display.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import tkinter as tk
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from animations import FrameCache
+
+
+class SizedImage:
+    """Stands in for a PhotoImage: it only knows its size."""
+
+    def __init__(self, width, height):
+        self._width = width
+        self._height = height
+
+    def width(self):
+        return self._width
+
+    def height(self):
+        return self._height
+
+
+class HeadlessFrameCache(FrameCache):
+    """A FrameCache over made-up files: GIFs with a set number of frames and PNG strips."""
+
+    def __init__(self, files, max_bytes=16 * 1024 * 1024):
+        """
+        Args:
+            files: path -> (frames, side)
+        """
+        super().__init__(None, max_bytes)
+        self.files = files
+        self.decoded = []  # (path, index) of every GIF frame read from "disk"
+
+    def _decode(self, path, image_format=None):
+        frames, side = self.files[path]
+        if image_format is None:
+            return SizedImage(frames * side, side)
+        index = int(image_format.split()[-1])
+        if index >= frames:
+            raise tk.TclError('no image data for this index')
+        self.decoded.append((path, index))
+        return SizedImage(side, side)
+
+    def _blank(self, width, height):
+        return SizedImage(width, height)
+
+    def _copy(self, target, source, region=None):
+        pass
+
+
+FRAME_BYTES = 10 * 10 * 4
+
+
+class GifFrameTests(unittest.TestCase):
+
+    def test_frames_are_read_in_order_once(self):
+        cache = HeadlessFrameCache({'a.gif': (5, 10)})
+        found = [cache.frame('a.gif', index) is not None for index in range(7)]
+        self.assertEqual(found, [True] * 5 + [False] * 2)
+        self.assertEqual(cache.decoded, [('a.gif', index) for index in range(5)])
+        self.assertEqual((cache.hits, cache.misses), (0, 5))
+
+    def test_cold_frame_builds_forward_from_the_first(self):
+        cache = HeadlessFrameCache({'a.gif': (5, 10)})
+        self.assertIsNotNone(cache.frame('a.gif', 3))
+        self.assertEqual(cache.decoded, [('a.gif', index) for index in range(4)])
+
+    def test_cold_frame_builds_from_the_nearest_cached_frame(self):
+        cache = HeadlessFrameCache({'a.gif': (10, 10)})
+        cache.frame('a.gif', 4)
+        cache.decoded = []
+        cache.frame('a.gif', 7)
+        self.assertEqual(cache.decoded, [('a.gif', index) for index in (5, 6, 7)])
+
+    def test_long_gif_with_a_tiny_cache(self):
+        # Used to recurse once per uncached earlier frame (RecursionError past ~1000)
+        cache = HeadlessFrameCache({'long.gif': (3000, 10)}, max_bytes=2 * FRAME_BYTES)
+        self.assertIsNotNone(cache.frame('long.gif', 2999))
+        self.assertEqual(len(cache.decoded), 3000)
+
+        # Playing on in order costs one decode per frame, even with only two cached
+        cache = HeadlessFrameCache({'long.gif': (3000, 10)}, max_bytes=2 * FRAME_BYTES)
+        for index in range(3000):
+            cache.frame('long.gif', index)
+        self.assertEqual(len(cache.decoded), 3000)
+        self.assertLessEqual(cache.bytes_used, 2 * FRAME_BYTES)
+
+    def test_end_is_remembered(self):
+        cache = HeadlessFrameCache({'a.gif': (3, 10)})
+        self.assertIsNone(cache.frame('a.gif', 5))
+        self.assertEqual(cache.decoded, [('a.gif', index) for index in range(3)])
+        cache.decoded = []
+        self.assertIsNone(cache.frame('a.gif', 4))
+        self.assertEqual(cache.decoded, [])
+
+
+class StripTests(unittest.TestCase):
+
+    def test_strip_reads_are_counted_apart_from_frame_hits(self):
+        cache = HeadlessFrameCache({'walk.png': (4, 10)})
+        for _ in range(2):
+            for index in range(5):
+                cache.frame('walk.png', index)
+        self.assertEqual((cache.hits, cache.misses), (4, 4))
+        self.assertEqual((cache.strip_loads, cache.strip_hits), (1, 4))
+        self.assertEqual(cache.hit_rate, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+Tests for the shared host's display-free parts: reading the sessions
+file, checking session settings and the shared scheduler's error handling.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import tkinter as tk
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diagnostics import DiagnosticsLog
+from host import SessionDiagnostics, SessionHost, SharedScheduler, check_session_settings
+
+
+class StubRoot:
+    def __init__(self, exists):
+        self.exists = exists
+
+    def winfo_exists(self):
+        return self.exists
+
+
+class StubApp:
+    """Just enough of LumbarReminderApp for the scheduler."""
+
+    def __init__(self, log, name, window_exists=True, error=None):
+        self.name = name
+        self.root = StubRoot(window_exists)
+        self.diagnostics = SessionDiagnostics(log, name)
+        self.error = error
+        self.is_running = True
+        self.steps = 0
+
+    def step_animation(self):
+        self.steps += 1
+        if self.error is not None:
+            raise self.error
+
+    def refresh_clock(self):
+        pass
+
+    def check_reminder(self):
+        pass
+
+
+class SharedSchedulerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.log = DiagnosticsLog(capacity=64)
+        self.interp = tk.Tcl()
+        self.lost = []
+        self.scheduler = SharedScheduler(self.interp, on_lost=self.lost.append)
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def events(self):
+        return [(record[3], record[4]['session']) for record in self.log.snapshot()]
+
+    def test_tcl_error_with_window_still_open_keeps_the_session(self):
+        buggy = StubApp(self.log, 'buggy', window_exists=True, error=tk.TclError('bad option'))
+        self.scheduler.add(buggy)
+        self.scheduler._tick()
+        self.assertEqual(self.scheduler.apps, [buggy])
+        self.assertEqual(self.lost, [])
+        self.assertEqual(self.events(), [('session_tick_failed', 'buggy')])
+
+    def test_destroyed_window_is_lost(self):
+        gone = StubApp(self.log, 'gone', window_exists=False, error=tk.TclError('bad window path'))
+        healthy = StubApp(self.log, 'healthy')
+        self.scheduler.add(gone)
+        self.scheduler.add(healthy)
+        self.scheduler._tick()
+        self.assertEqual(self.scheduler.apps, [healthy])
+        self.assertEqual(self.lost, [gone])
+        self.assertEqual(healthy.steps, 1)
+        self.assertEqual(self.events(), [('session_window_lost', 'gone')])
+
+    def test_other_errors_keep_the_session(self):
+        broken = StubApp(self.log, 'broken', error=ValueError('oops'))
+        self.scheduler.add(broken)
+        self.scheduler._tick()
+        self.assertEqual(self.scheduler.apps, [broken])
+        self.assertEqual(self.events(), [('session_tick_failed', 'broken')])
+
+
+class SessionsFileTests(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'sessions.json')
+        self.log = DiagnosticsLog(capacity=64)
+        self.host = SessionHost(self.path, diagnostics=self.log)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, config):
+        with open(self.path, 'w', encoding='utf-8') as sessions_file:
+            json.dump(config, sessions_file)
+
+    def test_defaults_are_filled_in(self):
+        self.write({'defaults': {'autostart': True, 'unknown': 1},
+                    'sessions': [{'name': 'alice', 'display': ':10'},
+                                 {'display': ':11', 'autostart': False}]})
+        self.assertEqual(self.host.read_sessions_file(), {
+            'alice': {'autostart': True, 'display': ':10'},
+            ':11': {'autostart': False, 'display': ':11'},
+        })
+
+    def test_bad_entries_are_skipped_not_fatal(self):
+        self.write({'sessions': [[1], 'bob', {'reminder_interval': 30},
+                                 {'name': 'alice', 'display': ':10'},
+                                 {'name': 'alice', 'display': ':12'}]})
+        self.assertEqual(self.host.read_sessions_file(), {'alice': {'display': ':10'}})
+        skipped = [record[4]['position'] for record in self.log.snapshot()
+                   if record[3] == 'session_entry_invalid']
+        self.assertEqual(skipped, [0, 1, 2, 4])
+
+    def test_unusable_file_is_an_error(self):
+        for config in ([1], {'sessions': {'alice': ':10'}}, {'defaults': [1]}):
+            with self.subTest(config=config):
+                self.write(config)
+                with self.assertRaises(ValueError):
+                    self.host.read_sessions_file()
+
+
+class SessionSettingsTests(unittest.TestCase):
+
+    def test_good_settings(self):
+        check_session_settings({'display': ':10', 'xauthority': '/home/a/.Xauthority', 'reminder_interval': '30',
+                                'working_hours': 'Mon-Fri 09:00-17:30', 'calendar': ['/home/a/work.ics'],
+                                'policy_server': 'policy-host:8765', 'autostart': True})
+        check_session_settings({})
+
+    def test_bad_settings(self):
+        for settings in ({'reminder_interval': 'thirty'}, {'reminder_interval': True},
+                         {'reminder_interval': 1e309},
+                         {'policy_server': 'host:abc'}, {'policy_server': 'host:70000'},
+                         {'working_hours': 'Fri-Mon 09:00-17:00'}, {'working_hours': 'Mon-Fri 17:00-09:00'},
+                         {'calendar': '/home/a/work.ics'}, {'display': 10}):
+            with self.subTest(settings=settings):
+                with self.assertRaises(ValueError):
+                    check_session_settings(settings)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+"""
+Tests for the policy protocol: framing, catching clients up after a
+reconnect, and how the client copes with malformed messages.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from policy import (MAX_FRAME_SIZE, PolicyClient, PolicyProtocolError, PolicyServer, apply_changes,
+                    decode_frames, diff_policies, encode_frame, load_policy_file, parse_quiet_hours)
+from policy import _Subscriber
+
+
+class FramingTests(unittest.TestCase):
+
+    def test_round_trip_across_split_reads(self):
+        messages = [{'type': 'delta', 'version': 7, 'changes': {'reminder_interval': 30}},
+                    {'type': 'ping'}]
+        data = b''.join(encode_frame(message) for message in messages)
+        buffer = bytearray()
+        received = []
+        for offset in range(0, len(data), 5):  # Arrives in small pieces
+            buffer.extend(data[offset:offset + 5])
+            received += decode_frames(buffer)
+        self.assertEqual(received, messages)
+        self.assertEqual(buffer, bytearray())
+
+    def test_incomplete_frame_stays_in_buffer(self):
+        frame = encode_frame({'type': 'ping'})
+        buffer = bytearray(frame[:-1])
+        self.assertEqual(decode_frames(buffer), [])
+        self.assertEqual(len(buffer), len(frame) - 1)
+
+    def test_oversized_frame_is_refused(self):
+        buffer = bytearray((MAX_FRAME_SIZE + 1).to_bytes(4, 'big'))
+        with self.assertRaises(PolicyProtocolError):
+            decode_frames(buffer)
+
+    def test_deltas(self):
+        old = {'reminder_interval': 40, 'quiet_hours': [['12:00', '13:00']]}
+        new = {'reminder_interval': 30}
+        changes = diff_policies(old, new)
+        self.assertEqual(changes, {'reminder_interval': 30, 'quiet_hours': None})
+        self.assertEqual(apply_changes(old, changes), new)
+
+
+class CatchUpTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = PolicyServer('127.0.0.1', 0, policy={'reminder_interval': 40}, history_size=3)
+        self.sent = []
+        self.server._send = lambda sock, subscriber, frame: self.sent.append(frame)
+        self.first = self.server.version
+
+    def tearDown(self):
+        self.server._selector.close()
+        self.server._wake_reader.close()
+        self.server._wake_writer.close()
+
+    def catch_up(self, known_version):
+        self.sent = []
+        self.server._catch_up(None, _Subscriber(), known_version)
+        buffer = bytearray(b''.join(self.sent))
+        return decode_frames(buffer)
+
+    def test_up_to_date_client_gets_nothing(self):
+        self.assertEqual(self.catch_up(self.first), [])
+
+    def test_recent_client_gets_the_deltas_it_missed(self):
+        for interval in (35, 30, 25):
+            self.server.publish({'reminder_interval': interval})
+        messages = self.catch_up(self.first + 1)
+        self.assertEqual([message['type'] for message in messages], ['delta', 'delta'])
+        self.assertEqual([message['version'] for message in messages], [self.first + 2, self.first + 3])
+
+    def test_client_older_than_history_gets_a_snapshot(self):
+        for interval in (35, 30, 25, 20):  # One more than the history keeps
+            self.server.publish({'reminder_interval': interval})
+        messages = self.catch_up(self.first)
+        self.assertEqual(messages, [{'type': 'snapshot', 'version': self.first + 4,
+                                     'policy': {'reminder_interval': 20}}])
+
+    def test_new_client_gets_a_snapshot(self):
+        self.server.publish({'reminder_interval': 35})
+        self.assertEqual([message['type'] for message in self.catch_up(0)], ['snapshot'])
+
+    def test_unchanged_publish_keeps_the_version(self):
+        self.assertEqual(self.server.publish({'reminder_interval': 40}), self.first)
+
+
+class ClientMessageTests(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.received = []
+        self.client = PolicyClient('127.0.0.1', 1, cache_path=os.path.join(self.temp_dir.name, 'policy.json'),
+                                   on_policy=lambda policy, version: self.received.append((policy, version)))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_snapshot_then_delta(self):
+        self.client.handle_message({'type': 'snapshot', 'version': 5, 'policy': {'reminder_interval': 40}})
+        self.client.handle_message({'type': 'delta', 'version': 6, 'changes': {'reminder_interval': 30}})
+        self.client.handle_message({'type': 'delta', 'version': 6, 'changes': {'reminder_interval': 99}})
+        self.assertEqual(self.received[-1], ({'reminder_interval': 30}, 6))
+        self.assertEqual(len(self.received), 2)  # The replayed delta was ignored
+
+        with open(self.client.cache_path, encoding='utf-8') as cache_file:
+            self.assertEqual(json.load(cache_file), {'version': 6, 'policy': {'reminder_interval': 30}})
+
+    def test_malformed_messages_are_protocol_errors(self):
+        for message in ([1], 'ping',
+                        {'type': 'delta', 'version': 5, 'changes': [1]},
+                        {'type': 'delta', 'version': 5, 'changes': 'x'},
+                        {'type': 'delta', 'version': '5', 'changes': {}},
+                        {'type': 'delta', 'version': True, 'changes': {}},
+                        {'type': 'snapshot', 'version': 5},
+                        {'type': 'snapshot', 'version': 5, 'policy': [['reminder_interval', 5]]}):
+            with self.subTest(message=message):
+                with self.assertRaises(PolicyProtocolError):
+                    self.client.handle_message(message)
+        self.assertEqual((self.client.policy, self.client.version), ({}, 0))
+        self.assertEqual(self.received, [])
+
+    def test_pings_and_unknown_types_are_ignored(self):
+        self.client.handle_message({'type': 'ping'})
+        self.client.handle_message({'type': 'something_new', 'version': 'x'})
+        self.assertEqual(self.received, [])
+
+
+class PolicyValueTests(unittest.TestCase):
+
+    def test_quiet_hours(self):
+        self.assertEqual(parse_quiet_hours([['22:00', '06:30']]), [(1320, 390)])
+        self.assertEqual(parse_quiet_hours(None), [])
+
+    def test_bad_quiet_hours_are_value_errors(self):
+        for value in ('22:00-06:00', [[1, 2]], [['9:00', 5]], [['22:00']], [['25:00', '06:00']],
+                      [['22:00', '06:60']], [['ab:cd', '06:00']], [{'from': '22:00'}]):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_quiet_hours(value)
+
+    def test_policy_file_rejects_bad_values(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'department.json')
+            for content in ('{"reminder_interval": "thirty"}', '{"reminder_interval": 1e309}',
+                            '{"quiet_hours": [[1, 2]]}', '[1]'):
+                with self.subTest(content=content):
+                    with open(path, 'w', encoding='utf-8') as policy_file:
+                        policy_file.write(content)
+                    with self.assertRaises(ValueError):
+                        load_policy_file(path)
+
+            with open(path, 'w', encoding='utf-8') as policy_file:
+                policy_file.write('{"reminder_interval": 30, "quiet_hours": [["12:00", "13:00"]], "colour": "red"}')
+            self.assertEqual(load_policy_file(path),
+                             {'reminder_interval': 30, 'quiet_hours': [['12:00', '13:00']]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+"""
+Tests for the suppression engine: the interval tree, the ICS/RRULE parser
+and the quiet-hours windows.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from suppression import (IntervalTree, RecurringEvent, SuppressionEngine, iter_ics_events,
+                         parse_ics_datetime, parse_ics_duration, parse_working_hours)
+
+
+def calendar(*events):
+    """Wrap VEVENT bodies (lists of lines) into the lines of an ICS file."""
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0']
+    for event in events:
+        lines += ['BEGIN:VEVENT'] + list(event) + ['END:VEVENT']
+    lines.append('END:VCALENDAR')
+    return [line + '\r\n' for line in lines]
+
+
+def engine_with(*events):
+    engine = SuppressionEngine()
+    for event in iter_ics_events(calendar(*events)):
+        engine.add_ics_event(event)
+    return engine
+
+
+class IntervalTreeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = IntervalTree([(10, 20, 'a'), (15, 30, 'b'), (40, 50, 'c'), (60, 60, 'empty')])
+
+    def test_contains_is_half_open(self):
+        self.assertFalse(self.tree.contains(9))
+        self.assertTrue(self.tree.contains(10))
+        self.assertTrue(self.tree.contains(29))
+        self.assertFalse(self.tree.contains(30))
+        self.assertFalse(self.tree.contains(60))  # Empty intervals are dropped
+
+    def test_next_free_skips_merged_blocks(self):
+        self.assertEqual(self.tree.next_free(12), 30)  # 'a' and 'b' overlap into one block
+        self.assertEqual(self.tree.next_free(35), 35)
+        self.assertEqual(self.tree.next_free(40), 50)
+
+    def test_overlapping_returns_every_label(self):
+        self.assertEqual(sorted(self.tree.overlapping(17)), ['a', 'b'])
+        self.assertEqual(self.tree.overlapping(25), ['b'])
+        self.assertEqual(self.tree.overlapping(35), [])
+
+    def test_overlapping_matches_brute_force(self):
+        intervals = [(start, start + length, index)
+                     for index, (start, length) in enumerate((start * 7 % 100, start % 13 + 1)
+                                                             for start in range(200))]
+        tree = IntervalTree(intervals)
+        for point in range(0, 115):
+            expected = sorted(label for start, end, label in intervals if start <= point < end)
+            self.assertEqual(sorted(tree.overlapping(point)), expected)
+            self.assertEqual(tree.contains(point), bool(expected))
+
+
+class IcsParsingTests(unittest.TestCase):
+
+    def test_folded_lines_and_unwanted_properties(self):
+        events = list(iter_ics_events(calendar([
+            'DTSTART:20261005T100000',
+            'DTEND:20261005T110000',
+            'SUMMARY:Quarterly',
+            '  planning',  # Folding drops exactly one leading space
+            'LOCATION:Room 4',
+        ])))
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['SUMMARY'], ({}, 'Quarterly planning'))
+        self.assertNotIn('LOCATION', events[0])
+
+    def test_repeated_exdate_lines_are_joined(self):
+        event = next(iter_ics_events(calendar([
+            'DTSTART:20261005T100000',
+            'EXDATE:20261006T100000',
+            'EXDATE:20261007T100000',
+        ])))
+        self.assertEqual(event['EXDATE'][1], '20261006T100000,20261007T100000')
+
+    def test_dates_and_durations(self):
+        self.assertEqual(parse_ics_datetime({'VALUE': 'DATE'}, '20261005'), (datetime(2026, 10, 5), True))
+        self.assertEqual(parse_ics_datetime({}, '20261005T093000'), (datetime(2026, 10, 5, 9, 30), False))
+        with self.assertRaises(ValueError):
+            parse_ics_datetime({}, '2026-10-05')
+        self.assertEqual(parse_ics_duration('PT1H30M'), timedelta(minutes=90))
+        self.assertEqual(parse_ics_duration('P1W2D'), timedelta(days=9))
+        self.assertEqual(parse_ics_duration('-PT15M'), timedelta(minutes=-15))
+
+    def test_free_and_cancelled_events_are_skipped(self):
+        engine = engine_with(
+            ['DTSTART:20261005T100000', 'DTEND:20261005T110000', 'TRANSP:TRANSPARENT'],
+            ['DTSTART:20261005T120000', 'DTEND:20261005T130000', 'STATUS:CANCELLED'],
+            ['DTSTART:bogus'],
+        )
+        self.assertEqual(engine.events, [])
+        self.assertEqual(engine.recurring, [])
+
+    def test_one_off_event_blocks_its_time(self):
+        engine = engine_with(['DTSTART:20261005T100000', 'DURATION:PT45M', 'SUMMARY:Standup'])
+        self.assertEqual(engine.reasons(datetime(2026, 10, 5, 10, 30)), ['Standup'])
+        self.assertFalse(engine.is_suppressed(datetime(2026, 10, 5, 10, 45)))
+        self.assertEqual(engine.next_allowed(datetime(2026, 10, 5, 10, 5)), datetime(2026, 10, 5, 10, 45))
+
+
+class RecurrenceTests(unittest.TestCase):
+
+    def occurrences(self, rule, start=datetime(2026, 10, 5, 9), exdates=(), days=14):
+        event = RecurringEvent(start, timedelta(minutes=30), rule, set(exdates), 'Meeting')
+        return [begin for begin, _ in event.occurrences(start - timedelta(days=1), start + timedelta(days=days))]
+
+    def test_daily_with_count(self):
+        self.assertEqual(self.occurrences('FREQ=DAILY;COUNT=3'),
+                         [datetime(2026, 10, day, 9) for day in (5, 6, 7)])
+
+    def test_daily_interval_and_until(self):
+        self.assertEqual(self.occurrences('FREQ=DAILY;INTERVAL=2;UNTIL=20261011T090000'),
+                         [datetime(2026, 10, day, 9) for day in (5, 7, 9, 11)])
+
+    def test_weekly_byday_with_exdate(self):
+        found = self.occurrences('FREQ=WEEKLY;BYDAY=MO,WE', exdates=[datetime(2026, 10, 7, 9)])
+        self.assertEqual(found, [datetime(2026, 10, 5, 9), datetime(2026, 10, 12, 9), datetime(2026, 10, 14, 9)])
+
+    def test_count_includes_excluded_dates(self):
+        # RFC 5545: EXDATE removes occurrences after COUNT has been applied
+        found = self.occurrences('FREQ=DAILY;COUNT=3', exdates=[datetime(2026, 10, 6, 9)])
+        self.assertEqual(found, [datetime(2026, 10, 5, 9), datetime(2026, 10, 7, 9)])
+
+    def test_far_future_window_without_count(self):
+        event = RecurringEvent(datetime(2000, 1, 3, 9), timedelta(hours=1), 'FREQ=WEEKLY;BYDAY=MO', set(), 'Weekly')
+        found = list(event.occurrences(datetime(2026, 10, 5), datetime(2026, 10, 13)))
+        self.assertEqual(found, [(datetime(2026, 10, 5, 9), datetime(2026, 10, 5, 10)),
+                                 (datetime(2026, 10, 12, 9), datetime(2026, 10, 12, 10))])
+
+    def test_recurring_event_through_the_engine(self):
+        engine = engine_with(['DTSTART:20261005T090000', 'DTEND:20261005T093000',
+                              'RRULE:FREQ=WEEKLY;BYDAY=MO', 'SUMMARY:Team sync'])
+        for weeks in range(0, 60, 7):  # Crosses many cached windows
+            monday = datetime(2026, 10, 5, 9, 15) + timedelta(weeks=weeks)
+            self.assertEqual(engine.reasons(monday), ['Team sync'])
+            self.assertFalse(engine.is_suppressed(monday + timedelta(days=1)))
+
+
+class QuietWindowTests(unittest.TestCase):
+
+    def test_overnight_quiet_hours_cover_first_morning_of_a_window(self):
+        # Regression: 2026-10-05 is the first day of a 14-day tree window, and the
+        # quiet hours starting the evening before used to be left out of it
+        engine = SuppressionEngine(horizon_days=14)
+        engine.set_quiet_windows([(18 * 60, 8 * 60)])
+        window_start, _, _ = engine.tree_for(datetime(2026, 10, 5, 3))
+        self.assertEqual(window_start, datetime(2026, 10, 5))
+
+        for day in range(5, 19):
+            with self.subTest(day=day):
+                self.assertTrue(engine.is_suppressed(datetime(2026, 10, day, 3)))
+                self.assertFalse(engine.is_suppressed(datetime(2026, 10, day, 12)))
+        self.assertEqual(engine.next_allowed(datetime(2026, 10, 5, 3)), datetime(2026, 10, 5, 8))
+
+    def test_working_hours(self):
+        engine = SuppressionEngine()
+        engine.set_working_hours(parse_working_hours('Mon-Fri 09:00-17:30'))
+        self.assertFalse(engine.is_suppressed(datetime(2026, 10, 5, 9)))
+        self.assertTrue(engine.is_suppressed(datetime(2026, 10, 5, 17, 30)))
+        self.assertEqual(engine.reasons(datetime(2026, 10, 10, 12)), ['Outside working hours'])
+        # Friday evening rolls over the weekend to Monday morning
+        self.assertEqual(engine.next_allowed(datetime(2026, 10, 9, 18)), datetime(2026, 10, 12, 9))
+
+    def test_parse_working_hours(self):
+        hours = parse_working_hours('Mon-Fri 09:00-17:30, Sat 10:00-14:00')
+        self.assertEqual(hours[0], (540, 1050))
+        self.assertEqual(hours[5], (600, 840))
+        self.assertNotIn(6, hours)
+
+    def test_reversed_day_range_is_rejected(self):
+        # Used to give an empty dict, silently dropping the working hours
+        with self.assertRaises(ValueError):
+            parse_working_hours('Fri-Mon 09:00-17:00')
+
+    def test_reversed_time_span_is_rejected(self):
+        # Used to suppress every day, deferring reminders by a year
+        with self.assertRaises(ValueError):
+            parse_working_hours('Mon-Fri 17:00-09:00')
+        with self.assertRaises(ValueError):
+            parse_working_hours('Mon 09:00-09:00')
+
+    def test_unreadable_working_hours_are_rejected(self):
+        for text in ('', 'Someday 09:00-17:00', 'Mon-Fri', 'Mon-Fri 09:00-25:00', 'Mon-Fri nine-five'):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    parse_working_hours(text)
+
+
+if __name__ == '__main__':
+    unittest.main()